@@ -2,6 +2,7 @@ import pandas as pd
 import os
 from sqlalchemy import create_engine
 from utils.database_utils import test_database_connection
+from utils.data_quality import DataQualityReport
 from utils.data_analysis import (
     load_data,
     get_counts,
@@ -14,35 +15,70 @@ from utils.data_analysis import (
 )
 
 db_path = os.path.join("../data", "case.db")
+# "pandas" loads every table into memory, "duckdb" queries case.db on all cores
+engine = os.getenv("ANALYSIS_ENGINE", "pandas")
+# ANALYSIS_QUARANTINE=1 drops rows failing validation (unparseable durations, duplicate
+# IDs) from the pandas analyses and saves them to ../data/quarantine_<table>.csv
+quarantine = os.getenv("ANALYSIS_QUARANTINE", "").lower() in ("1", "true", "yes")
 # test db
 test_database_connection(db_path)
 
 # --- Data Analysis ---
-cases_df = load_data(db_path, "cases")
-phone_df = load_data(db_path, "phone")
-omni_df = load_data(db_path, "email_web_whatsapp_community")
-whatsapp_df = load_data(db_path, "whatsapp")
+cases_df = phone_df = omni_df = whatsapp_df = None
+if engine == "pandas":
+    # validate while loading
+    quality_report = DataQualityReport()
+    cases_df = load_data(
+        db_path, "cases", quality_report=quality_report, quarantine=quarantine
+    )
+    phone_df = load_data(
+        db_path, "phone", quality_report=quality_report, quarantine=quarantine
+    )
+    omni_df = load_data(
+        db_path,
+        "email_web_whatsapp_community",
+        quality_report=quality_report,
+        quarantine=quarantine,
+    )
+    whatsapp_df = load_data(
+        db_path, "whatsapp", quality_report=quality_report, quarantine=quarantine
+    )
+    quality_report.save()
+else:
+    print(
+        "\nData quality validation runs in the pandas loader and is skipped "
+        "with the duckdb engine, data_quality_report.csv is not updated."
+    )
 
 # get counts
-if cases_df is not None:
-    get_counts(cases_df, "Origin")
-    get_counts(cases_df, "Status")
-    get_counts(cases_df, "Issue type")
+if engine == "duckdb" or cases_df is not None:
+    get_counts(cases_df, "Origin", engine=engine, db_path=db_path)
+    get_counts(cases_df, "Status", engine=engine, db_path=db_path)
+    get_counts(cases_df, "Issue type", engine=engine, db_path=db_path)
 
 # join counts
-analyse_join_counts(db_path)
+analyse_join_counts(db_path, engine=engine)
 
 # average handle time
-analyse_avg_handle_time(cases_df, omni_df, phone_df)
+analyse_avg_handle_time(cases_df, omni_df, phone_df, engine=engine, db_path=db_path)
 
 # multiple call average
-analyse_avg_phone_entries(cases_df, phone_df)
+analyse_avg_phone_entries(cases_df, phone_df, engine=engine, db_path=db_path)
 
 # average handle time per issue type
-analyse_avg_handle_time_by_issue_type(cases_df, omni_df, phone_df)
+analyse_avg_handle_time_by_issue_type(
+    cases_df, omni_df, phone_df, engine=engine, db_path=db_path
+)
 
 # average handle time and counts per issue type and origin
-analyse_handle_time_issue_origin_counts(cases_df, omni_df, phone_df)
+analyse_handle_time_issue_origin_counts(
+    cases_df, omni_df, phone_df, engine=engine, db_path=db_path
+)
 
 # bot success rate so far
-analyse_whatsapp_success_rate(whatsapp_df)
+analyse_whatsapp_success_rate(whatsapp_df, engine=engine, db_path=db_path)
+
+if engine == "duckdb":
+    from utils.duckdb_analysis import close_connections
+
+    close_connections()
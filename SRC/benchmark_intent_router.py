@@ -0,0 +1,91 @@
+import statistics
+from llm_prototype import load_prompt_from_file
+from utils.intent_router import IntentRouter
+
+# Sample queries with the expected intent (None means the LLM should answer)
+SAMPLE_QUERIES = [
+    ("How do I update my profile description?", "profile_text"),
+    ("I want to change the text on my profile", "profile_text"),
+    ("where do i edit my company description in the app", "profile_text"),
+    ("I've just joined and need help with vetting", "vetting"),
+    ("Where do I upload my outstanding documents?", "vetting"),
+    ("I never got the SMS to verify my ID", "vetting"),
+    ("How do I get more leads?", "getting_leads"),
+    ("I'm not getting enough enquiries", "getting_leads"),
+    ("How do I add my accreditation?", "getting_leads"),
+    ("Where do I send my public liability insurance?", "getting_leads"),
+    ("I don't understand my invoice", "invoice"),
+    ("When will the direct debit be taken?", "invoice"),
+    ("Why is there VAT on my bill?", "invoice"),
+    ("Can I pay by BACS?", "invoice"),
+    ("A customer left me a fake review", None),
+    ("I want to cancel my membership", None),
+    ("How do I change my trade category?", None),
+    ("hello", None),
+]
+
+# Held-out queries that were not used to write the keyword rules, mostly mentioning a
+# documented topic without asking the documented question
+HELD_OUT_QUERIES = [
+    ("I received no leads this month and want to cancel", None),
+    ("how do i cancel my insurance claim", None),
+    ("I need a job description", None),
+    ("can you write a description for my van advert", None),
+    ("I was billed twice and want a refund", None),
+    ("my insurance renewal price went up", None),
+    ("what counts as a lead", None),
+    ("who do I complain to about my invoice", None),
+    ("can I see who viewed my profile", None),
+    ("My vetting was rejected, can I appeal?", None),
+    ("stop the direct debit", None),
+    ("my direct debit failed, will my profile be removed?", None),
+    ("My profile description was changed without my permission", None),
+    ("I was vetted last year, how do I renew my membership?", None),
+    ("Can you help me add a new accreditation to my account?", "getting_leads"),
+    ("How long does vetting take?", "vetting"),
+    ("Where can I download my invoice?", "invoice"),
+]
+
+
+def benchmark_intent_router(router, queries, repeats=100):
+    """
+    Benchmarks routing decisions and latency on labelled queries.
+    :param router: IntentRouter to benchmark
+    :param queries: list of (query, expected intent or None) tuples
+    :param repeats: number of times each query is routed for the latency figures
+    :return: None
+    """
+    correct = 0
+    routed = 0
+    wrongly_answered = 0
+    latencies = []
+    for query, expected_intent in queries:
+        decision = router.route(query)
+        correct += decision["intent"] == expected_intent
+        routed += decision["intent"] is not None
+        wrongly_answered += decision["intent"] not in (None, expected_intent)
+        print(
+            f"{decision['method']:>7} -> {str(decision['intent']):<13} "
+            f"(expected {str(expected_intent):<13}) {query}"
+        )
+        for _ in range(repeats):
+            latencies.append(router.route(query)["latency_ms"])
+
+    latencies.sort()
+    print(f"\nCorrect routing decisions: {correct}/{len(queries)}")
+    print(f"Answered without LLM: {routed}/{len(queries)}")
+    print(f"Answered with the wrong documented section: {wrongly_answered}")
+    print(
+        f"Routing latency: median {statistics.median(latencies):.3f} ms, "
+        f"p99 {latencies[int(0.99 * (len(latencies) - 1))]:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    instructions = load_prompt_from_file("prompt_instructions.txt")
+    if instructions:
+        router = IntentRouter(instructions)
+        print("--- Sample queries ---")
+        benchmark_intent_router(router, SAMPLE_QUERIES)
+        print("\n--- Held-out queries ---")
+        benchmark_intent_router(router, HELD_OUT_QUERIES)
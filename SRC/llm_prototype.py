@@ -1,12 +1,19 @@
 import os
+import time
 import google.generativeai as genai
 from dotenv import load_dotenv
+from utils.prompt_template import PromptTemplate, estimate_tokens
+from utils.bot_metrics import BotMetricsStore
+from utils.intent_router import IntentRouter
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Get the Gemini API key from the environment variables
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+MODEL_NAME = "gemini-2.0-flash"
+MAX_PROMPT_TOKENS = 8000
+MAX_OUTPUT_TOKENS = 512
 
 
 def load_prompt_from_file(filepath):
@@ -26,33 +33,110 @@ def get_user_input():
     return user_text
 
 
-def call_gemini(prompt):
-    """Calls the Gemini API with the given prompt."""
+def count_gemini_tokens(text):
+    """
+    Counts tokens with the Gemini tokenizer (one API call), used once for the fixed prompt prefix.
+    Falls back to the local estimate if the API call fails, so the bot still starts.
+    """
+    try:
+        genai.configure(api_key=GOOGLE_API_KEY)
+        model = genai.GenerativeModel(MODEL_NAME)
+        return model.count_tokens(text).total_tokens
+    except Exception as e:
+        print(f"Error counting tokens with the Gemini API, using an estimate: {e}")
+        return estimate_tokens(text)
+
+
+def call_gemini(
+    prompt, metrics_store=None, estimated_prompt_tokens=None, max_output_tokens=None
+):
+    """Calls the Gemini API with the given prompt, logging token usage and latency to the metrics store."""
     if not GOOGLE_API_KEY:
         print("Error: GOOGLE_API_KEY environment variable not set.")
         return None
 
     genai.configure(api_key=GOOGLE_API_KEY)
-    model = genai.GenerativeModel("gemini-2.0-flash")
+    model = genai.GenerativeModel(MODEL_NAME)
 
+    start = time.perf_counter()
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        response = model.generate_content(
+            prompt, generation_config={"max_output_tokens": max_output_tokens}
+        )
+        # Raises ValueError when the response has no parts (e.g. a SAFETY finish)
+        response_text = response.text
+        usage = response.usage_metadata
     except Exception as e:
         print(f"Error calling Gemini API: {e}")
+        if metrics_store is not None:
+            metrics_store.log(
+                "error",
+                estimated_prompt_tokens=estimated_prompt_tokens,
+                latency_ms=(time.perf_counter() - start) * 1000,
+            )
         return None
 
+    if metrics_store is not None:
+        metrics_store.log(
+            "ok",
+            estimated_prompt_tokens=estimated_prompt_tokens,
+            prompt_tokens=usage.prompt_token_count,
+            cached_tokens=usage.cached_content_token_count,
+            response_tokens=usage.candidates_token_count,
+            latency_ms=(time.perf_counter() - start) * 1000,
+        )
+    return response_text
+
+
+def answer_query(user_query, template, router, metrics_store):
+    """
+    Answers a user query from the documented help sections through the intent router, or
+    with Gemini if the rendered prompt fits the token budget. Each request is logged to
+    the metrics store ('ok', 'over_budget' or 'error').
+    :param user_query: text typed by the user
+    :param template: PromptTemplate holding the fixed instruction prefix
+    :param router: IntentRouter answering common documented questions
+    :param metrics_store: BotMetricsStore the request is logged to
+    :return: response text, or None if the query could not be answered
+    """
+    routed = router.route(user_query)
+    if routed["answer"] is not None:
+        metrics_store.log("ok", route=routed["intent"], latency_ms=routed["latency_ms"])
+        print("\nBot Response:")
+        print(routed["answer"])
+        return routed["answer"]
+
+    full_prompt, prompt_tokens = template.render(user_query)
+    if full_prompt is None:
+        metrics_store.log("over_budget", estimated_prompt_tokens=prompt_tokens)
+        return None
+
+    gemini_response = call_gemini(
+        full_prompt,
+        metrics_store=metrics_store,
+        estimated_prompt_tokens=prompt_tokens,
+        max_output_tokens=MAX_OUTPUT_TOKENS,
+    )
+    if gemini_response:
+        print("\nGemini Response:")
+        print(gemini_response)
+    return gemini_response
+
 
 if __name__ == "__main__":
     prompt_file = "prompt_instructions.txt"
+    # The instruction prefix is loaded and tokenised once, only the query suffix changes
     instructions = load_prompt_from_file(prompt_file)
+    metrics_store = BotMetricsStore()
 
     if instructions:
+        template = PromptTemplate(
+            instructions,
+            max_prompt_tokens=MAX_PROMPT_TOKENS,
+            token_counter=count_gemini_tokens if GOOGLE_API_KEY else None,
+        )
+        # Common documented questions are answered locally without an LLM call
+        router = IntentRouter(instructions)
         user_query = get_user_input()
         if user_query is not None:
-            full_prompt = f"{instructions}\n\nUser Query: {user_query}\n\nResponse:"
-            gemini_response = call_gemini(full_prompt)
-
-            if gemini_response:
-                print("\nGemini Response:")
-                print(gemini_response)
+            answer_query(user_query, template, router, metrics_store)
@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from utils.data_analysis import (
+    load_data,
+    get_counts,
+    analyse_join_counts,
+    analyse_avg_handle_time,
+    analyse_avg_phone_entries,
+    analyse_avg_handle_time_by_issue_type,
+    analyse_handle_time_issue_origin_counts,
+    analyse_whatsapp_success_rate,
+)
+
+# The analysis functions read and write relative to SRC/ ("../data"), so the service
+# runs from this directory wherever it is started from.
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join("..", "data")
+TABLES = ["cases", "phone", "email_web_whatsapp_community", "whatsapp"]
+
+
+def get_count_results(cases_df):
+    """
+    Runs get_counts for the counted columns of the cases table.
+    :param cases_df: data frame of the cases table
+    :return: dict of output name -> counts data frame (as saved to CSV), or None on error
+    """
+    results = {}
+    for column_name in ["Origin", "Status", "Issue type"]:
+        counts, percentages = get_counts(cases_df, column_name)
+        if counts is None:
+            return None
+        output_name = f'{column_name.lower().replace(" ", "_")}_counts'
+        results[output_name] = pd.DataFrame(
+            {"Count": counts, "Percentage": percentages}
+        ).reset_index()
+    return results
+
+
+# Each analysis: (tables it depends on, function of (dfs, db_path) returning a dict of
+# output name -> result data frame, or None if the analysis failed)
+ANALYSES = {
+    "counts": ({"cases"}, lambda dfs, db_path: get_count_results(dfs["cases"])),
+    "join_counts": (set(TABLES), lambda dfs, db_path: analyse_join_counts(db_path)),
+    "avg_handle_time": (
+        {"cases", "email_web_whatsapp_community", "phone"},
+        lambda dfs, db_path: analyse_avg_handle_time(
+            dfs["cases"], dfs["email_web_whatsapp_community"], dfs["phone"]
+        ),
+    ),
+    "avg_phone_entries": (
+        {"cases", "phone"},
+        lambda dfs, db_path: analyse_avg_phone_entries(dfs["cases"], dfs["phone"]),
+    ),
+    "avg_handle_time_by_issue_type": (
+        {"cases", "email_web_whatsapp_community", "phone"},
+        lambda dfs, db_path: analyse_avg_handle_time_by_issue_type(
+            dfs["cases"], dfs["email_web_whatsapp_community"], dfs["phone"]
+        ),
+    ),
+    "handle_time_issue_origin_counts": (
+        {"cases", "email_web_whatsapp_community", "phone"},
+        lambda dfs, db_path: analyse_handle_time_issue_origin_counts(
+            dfs["cases"], dfs["email_web_whatsapp_community"], dfs["phone"]
+        ),
+    ),
+    "whatsapp_success_rate": (
+        {"whatsapp"},
+        lambda dfs, db_path: analyse_whatsapp_success_rate(dfs["whatsapp"]),
+    ),
+}
+
+
+class TableHash:
+    """
+    SQLite aggregate hashing every row it is given, registered as table_hash().
+    repr() keeps the value types apart, e.g. 1, 1.0 and '1' hash differently.
+    """
+
+    def __init__(self):
+        self.hash = hashlib.sha1()
+
+    def step(self, *values):
+        self.hash.update(repr(values).encode())
+
+    def finalize(self):
+        return self.hash.hexdigest()
+
+
+class RefreshService:
+    """
+    Watches case.db and re-runs only the analyses whose tables changed.
+    Results are kept in memory as pre-serialised JSON with an ETag, so reads never
+    trigger recomputation.
+    """
+
+    def __init__(self, db_path, poll_interval=10):
+        """
+        :param db_path: The path to the SQLite database file.
+        :type db_path: str
+        :param poll_interval: seconds between change checks
+        :type poll_interval: float
+        """
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.results = {}
+        self.results_lock = threading.Lock()
+        self.dfs = {}
+        self.table_fingerprints = {}
+        self.file_state = None
+        self.data_version = None
+        # PRAGMA data_version only changes for commits made by other connections,
+        # so the same connection is kept open between checks.
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.create_aggregate("table_hash", -1, TableHash)
+
+    def database_changed(self):
+        """
+        Cheap check run every poll: database file mtime/size and PRAGMA data_version.
+        :return: True if the database may have changed since the last check
+        """
+        file_state = tuple(
+            (os.stat(path).st_mtime_ns, os.stat(path).st_size)
+            for path in [self.db_path, self.db_path + "-wal"]
+            if os.path.exists(path)
+        )
+        data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        changed = (file_state, data_version) != (self.file_state, self.data_version)
+        self.file_state, self.data_version = file_state, data_version
+        return changed
+
+    def table_fingerprint(self, table_name):
+        """
+        Fingerprints a table with a content hash computed inside the SQLite query
+        (the table_hash aggregate), so no data frame is built for unchanged tables.
+        Every value of every row is hashed in rowid order, so any insert, delete or
+        in-place update changes the fingerprint.
+        :param table_name: name of the table
+        :return: (row count, hex digest), or None if the table does not exist
+        """
+        columns = [
+            row[1]
+            for row in self.connection.execute(f'PRAGMA table_info("{table_name}")')
+        ]
+        if not columns:
+            return None
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        return self.connection.execute(
+            f"SELECT COUNT(*), table_hash(rowid, {column_list}) "
+            f'FROM (SELECT rowid, * FROM "{table_name}" ORDER BY rowid)'
+        ).fetchone()
+
+    def changed_tables(self):
+        """
+        Works out which tables changed by comparing a fingerprint of each table.
+        Only the changed tables are reloaded into memory, as a side effect.
+        :return: set of changed table names
+        """
+        changed = set()
+        for table_name in TABLES:
+            try:
+                fingerprint = self.table_fingerprint(table_name)
+            except sqlite3.Error as e:
+                print(f"Error fingerprinting table {table_name}: {e}")
+                continue
+            if fingerprint is None or fingerprint == self.table_fingerprints.get(
+                table_name
+            ):
+                continue
+            df = load_data(self.db_path, table_name)
+            if df is None:
+                # Fingerprint not stored, so the load is retried on the next change
+                continue
+            self.table_fingerprints[table_name] = fingerprint
+            self.dfs[table_name] = df
+            changed.add(table_name)
+        return changed
+
+    def refresh(self, changed_tables):
+        """
+        Re-runs the analyses that depend on the changed tables and updates the in-memory results.
+        A failed analysis keeps serving its previous results.
+        :param changed_tables: set of table names that changed
+        :return: list of analyses that were re-run
+        """
+        rerun = []
+        for name, (tables, analysis) in ANALYSES.items():
+            if not tables & changed_tables or not tables <= self.dfs.keys():
+                continue
+            try:
+                # Analyses add helper columns, so they get copies of the cached tables
+                results = analysis(
+                    {t: self.dfs[t].copy() for t in tables}, self.db_path
+                )
+            except Exception as e:
+                print(f"Error during refresh of {name}: {e}")
+                continue
+            if results is None:
+                print(
+                    f"Error during refresh of {name}: the analysis returned no results"
+                )
+                continue
+            for output_name, result_df in results.items():
+                self.store_result(output_name, result_df)
+            rerun.append(name)
+        return rerun
+
+    def store_result(self, output_name, result_df):
+        """
+        Stores a result data frame in memory as JSON with an ETag.
+        :param output_name: output name, the CSV file name without extension
+        :param result_df: result data frame returned by the analysis
+        """
+        body = result_df.to_json(orient="records").encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        with self.results_lock:
+            self.results[output_name] = (etag, body)
+
+    def get_result(self, output_name):
+        """
+        :param output_name: CSV file name without extension
+        :return: (etag, JSON body), or None if the result does not exist
+        """
+        with self.results_lock:
+            return self.results.get(output_name)
+
+    def check_once(self):
+        """
+        Runs one change check and refresh.
+        :return: list of analyses that were re-run
+        """
+        if not self.database_changed():
+            return []
+        changed = self.changed_tables()
+        if not changed:
+            return []
+        rerun = self.refresh(changed)
+        print(f"\nTables changed: {sorted(changed)}, analyses re-run: {rerun}")
+        return rerun
+
+    def run_forever(self):
+        """Polls the database for changes until the process stops."""
+        while True:
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"Error during refresh check: {e}")
+            time.sleep(self.poll_interval)
+
+
+def make_handler(service):
+    """
+    Builds the HTTP handler serving the in-memory results.
+    GET /results lists the available results and their ETags,
+    GET /results/<name> returns one result (304 if If-None-Match matches its ETag).
+    :param service: RefreshService holding the results
+    :return: handler class for ThreadingHTTPServer
+    """
+
+    class ResultsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/results":
+                with service.results_lock:
+                    index = {name: etag for name, (etag, _) in service.results.items()}
+                self.send_body(200, json.dumps(index).encode())
+                return
+
+            result = None
+            if path.startswith("/results/"):
+                result = service.get_result(path[len("/results/") :])
+            if result is None:
+                self.send_body(404, json.dumps({"error": "not found"}).encode())
+                return
+
+            etag, body = result
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_body(200, body, etag)
+
+        def send_body(self, status, body, etag=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if etag is not None:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ResultsHandler
+
+
+if __name__ == "__main__":
+    os.chdir(SRC_DIR)
+    db_path = os.path.join(DATA_DIR, "case.db")
+    port = int(os.getenv("REFRESH_PORT", "8050"))
+    poll_interval = float(os.getenv("REFRESH_POLL_SECONDS", "10"))
+
+    refresh_service = RefreshService(db_path, poll_interval=poll_interval)
+    threading.Thread(target=refresh_service.run_forever, daemon=True).start()
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(refresh_service))
+    print(f"Serving analysis results on http://127.0.0.1:{port}/results")
+    server.serve_forever()
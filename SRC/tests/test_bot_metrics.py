@@ -0,0 +1,30 @@
+import sqlite3
+from utils.bot_metrics import BotMetricsStore
+
+
+def test_adds_route_column_to_existing_database(tmp_path):
+    db_path = str(tmp_path / "bot_metrics.db")
+    # Schema written before the route column existed
+    with sqlite3.connect(db_path) as con:
+        con.execute(
+            "CREATE TABLE requests (timestamp REAL, status TEXT, "
+            "estimated_prompt_tokens INTEGER, prompt_tokens INTEGER, "
+            "cached_tokens INTEGER, response_tokens INTEGER, latency_ms REAL)"
+        )
+        con.execute(
+            "INSERT INTO requests VALUES (1.0, 'ok', 1400, 1390, 0, 120, 950.0)"
+        )
+
+    store = BotMetricsStore(db_path)
+    store.log("ok", route="invoice", latency_ms=0.5)
+    store.log("ok", estimated_prompt_tokens=1400, prompt_tokens=1390, latency_ms=900)
+
+    with sqlite3.connect(db_path) as con:
+        rows = con.execute(
+            "SELECT status, route, prompt_tokens, latency_ms FROM requests"
+        ).fetchall()
+    assert rows == [
+        ("ok", None, 1390, 950.0),
+        ("ok", "invoice", None, 0.5),
+        ("ok", "llm", 1390, 900.0),
+    ]
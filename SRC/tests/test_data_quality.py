@@ -0,0 +1,116 @@
+import sqlite3
+import pandas as pd
+import pytest
+from utils.data_analysis import load_data, time_to_seconds
+from utils.data_quality import DataQualityReport, is_valid_duration
+
+DURATIONS = [
+    "00:05:00",
+    "5:00",
+    "300",
+    " 5:00",
+    "-",
+    None,
+    12.5,
+    0,
+    "abc",
+    "",
+    "5:xx",
+    "²",
+    "1:2:3:4",
+    "1:-2",
+]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # load_data writes quarantined rows to ../data relative to the working directory (SRC/)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "SRC").mkdir()
+    monkeypatch.chdir(tmp_path / "SRC")
+    db_path = str(tmp_path / "data" / "case.db")
+    con = sqlite3.connect(db_path)
+    con.execute(
+        'CREATE TABLE cases ("Id" TEXT, "Case Number" INTEGER, "SESSION ID" REAL)'
+    )
+    con.executemany(
+        "INSERT INTO cases VALUES (?, ?, ?)",
+        [
+            ("c1", 1, None),
+            ("c2", 2, None),
+            ("c3", 3, 101.0),
+            ("c1", 4, 102.0),  # duplicate Id in another chunk
+            ("c5", 2, None),  # duplicate Case Number in another chunk
+        ],
+    )
+    con.execute('CREATE TABLE phone ("SESSION ID" REAL, "HANDLE TIME" TEXT)')
+    con.executemany(
+        "INSERT INTO phone VALUES (?, ?)",
+        [(101.0, "00:05:00"), (101.0, "-"), (103.0, "5:xx"), (104.0, None)],
+    )
+    con.commit()
+    con.close()
+    return db_path
+
+
+@pytest.mark.parametrize("value", DURATIONS)
+def test_is_valid_duration_agrees_with_time_to_seconds(value):
+    try:
+        seconds = time_to_seconds(value)
+    except ValueError:
+        assert not is_valid_duration(value)
+        return
+    if is_valid_duration(value):
+        # Valid durations convert to a non-negative number, or None for '-' and nulls
+        assert seconds is None or seconds >= 0
+
+
+def test_duplicate_ids_across_chunks(db_path):
+    report = DataQualityReport()
+    df = load_data(db_path, "cases", quality_report=report, chunksize=2)
+
+    assert len(df) == 5
+    assert report.counts[("cases", "Id", "duplicate_ids")] == 1
+    assert report.counts[("cases", "Case Number", "duplicate_ids")] == 1
+    assert report.counts[("cases", "SESSION ID", "nulls")] == 3
+
+
+def test_chunked_read_keeps_single_read_dtypes(db_path):
+    single = load_data(db_path, "cases")
+    chunked = load_data(
+        db_path, "cases", quality_report=DataQualityReport(), chunksize=2
+    )
+
+    # The first chunk of SESSION ID is all null
+    assert chunked["SESSION ID"].dtype == "float64"
+    pd.testing.assert_series_equal(chunked.dtypes, single.dtypes)
+    pd.testing.assert_frame_equal(chunked, single)
+
+
+def test_orphan_counts(db_path):
+    report = DataQualityReport()
+    load_data(db_path, "phone", quality_report=report, chunksize=2)
+    # Parent table not loaded yet, nothing to compare against
+    assert report.orphan_counts() == {}
+
+    load_data(db_path, "cases", quality_report=report, chunksize=2)
+    # 103 and 104 have no case, 101 appears twice but counts as one key
+    assert report.orphan_counts() == {("phone", "SESSION ID"): 2}
+    report_df = report.to_dataframe()
+    orphans = report_df[report_df["Check"] == "orphan_keys"]
+    assert orphans["Count"].tolist() == [2]
+
+
+def test_quarantine_csv(db_path, tmp_path):
+    report = DataQualityReport()
+    df = load_data(
+        db_path, "phone", quality_report=report, quarantine=True, chunksize=2
+    )
+
+    assert df["SESSION ID"].tolist() == [101.0, 101.0, 104.0]
+    assert report.counts[("phone", "HANDLE TIME", "unparseable_durations")] == 1
+    assert report.counts[("phone", "HANDLE TIME", "dash_sentinels")] == 1
+    quarantined = pd.read_csv(tmp_path / "data" / "quarantine_phone.csv")
+    assert quarantined.to_dict("records") == [
+        {"SESSION ID": 103.0, "HANDLE TIME": "5:xx"}
+    ]
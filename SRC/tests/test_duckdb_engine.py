@@ -0,0 +1,175 @@
+import random
+import sqlite3
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+from utils import duckdb_analysis
+from utils.data_analysis import (
+    load_data,
+    get_counts,
+    analyse_join_counts,
+    analyse_avg_handle_time,
+    analyse_avg_phone_entries,
+    analyse_avg_handle_time_by_issue_type,
+    analyse_handle_time_issue_origin_counts,
+    analyse_whatsapp_success_rate,
+)
+
+TABLES = ["cases", "phone", "email_web_whatsapp_community", "whatsapp"]
+
+
+def build_case_db(db_path):
+    """Small case.db with null keys, duplicate keys and '-'/null/MM:SS/SS/edge durations."""
+    rng = random.Random(7)
+    con = sqlite3.connect(db_path)
+    con.execute(
+        'CREATE TABLE cases ("Id" TEXT, "Case Number" INTEGER, "Origin" TEXT, '
+        '"Status" TEXT, "Issue type" TEXT, "SESSION ID" TEXT)'
+    )
+    con.execute(
+        'CREATE TABLE phone ("SESSION ID" TEXT, "CAMPAIGN" TEXT, "HANDLE TIME" TEXT)'
+    )
+    con.execute(
+        'CREATE TABLE email_web_whatsapp_community ("Work Item Id" TEXT, '
+        '"Queue name" TEXT, "Handle Time" REAL, "Status" TEXT)'
+    )
+    con.execute(
+        'CREATE TABLE whatsapp ("Case Id" TEXT, "Agent Type" TEXT, "Status" TEXT, '
+        '"Agent Message Count" INTEGER)'
+    )
+    origins = ["Web", "Phone", "WhatsApp", None]
+    statuses = ["Closed", "New", "Approved"]
+    issue_types = ["Profile Text", "Accreditation", "Directory", None]
+    for i in range(400):
+        con.execute(
+            "INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                None if i % 97 == 0 else f"c{i}",
+                i,
+                rng.choice(origins),
+                rng.choice(statuses),
+                rng.choice(issue_types),
+                None if i % 89 == 0 else f"s{i}",
+            ),
+        )
+    for _ in range(600):
+        handle_time = rng.choice(
+            [
+                f"00:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+                f"{rng.randint(1, 3)}:{rng.randint(0, 59):02d}:00",
+                f"{rng.randint(0, 59)}:{rng.randint(0, 59):02d}",
+                str(rng.randint(0, 500)),
+                # Exactly on the histogram edges
+                rng.choice(["01:00", "5:00", "10:00", "30:00", "1:00:00", "2:00:00"]),
+                "-",
+                None,
+            ]
+        )
+        session_id = None if rng.random() < 0.02 else f"s{rng.randint(0, 450)}"
+        con.execute(
+            "INSERT INTO phone VALUES (?, ?, ?)", (session_id, "x", handle_time)
+        )
+    for _ in range(500):
+        handle_time = rng.choice([None, 0.0, rng.expovariate(1 / 900)])
+        work_item_id = None if rng.random() < 0.02 else f"c{rng.randint(0, 450)}"
+        con.execute(
+            "INSERT INTO email_web_whatsapp_community VALUES (?, ?, ?, ?)",
+            (work_item_id, "q", handle_time, "Closed"),
+        )
+    for _ in range(300):
+        con.execute(
+            "INSERT INTO whatsapp VALUES (?, ?, ?, ?)",
+            (
+                f"c{rng.randint(0, 450)}",
+                rng.choice(["Bot", "Agent"]),
+                "x",
+                rng.randint(0, 3),
+            ),
+        )
+    con.commit()
+    con.close()
+
+
+def shim_connect(db_path, memory_limit=None, temp_directory=None):
+    """Copies the SQLite tables into DuckDB when the sqlite extension cannot be installed."""
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA case_db")
+    sqlite_con = sqlite3.connect(db_path)
+    for table_name in TABLES:
+        df = pd.read_sql(f"SELECT * FROM {table_name}", sqlite_con)
+        con.register("table_df", df)
+        con.execute(f"CREATE TABLE case_db.{table_name} AS SELECT * FROM table_df")
+        con.unregister("table_df")
+    sqlite_con.close()
+    con.execute(duckdb_analysis.TO_SECONDS_MACRO)
+    return con
+
+
+def run_analyses(engine, db_path):
+    cases_df = phone_df = omni_df = whatsapp_df = None
+    if engine == "pandas":
+        cases_df = load_data(db_path, "cases")
+        phone_df = load_data(db_path, "phone")
+        omni_df = load_data(db_path, "email_web_whatsapp_community")
+        whatsapp_df = load_data(db_path, "whatsapp")
+    for column_name in ["Origin", "Status", "Issue type"]:
+        get_counts(cases_df, column_name, engine=engine, db_path=db_path)
+    analyse_join_counts(db_path, engine=engine)
+    analyse_avg_handle_time(cases_df, omni_df, phone_df, engine=engine, db_path=db_path)
+    analyse_avg_phone_entries(cases_df, phone_df, engine=engine, db_path=db_path)
+    analyse_avg_handle_time_by_issue_type(
+        cases_df, omni_df, phone_df, engine=engine, db_path=db_path
+    )
+    analyse_handle_time_issue_origin_counts(
+        cases_df, omni_df, phone_df, engine=engine, db_path=db_path
+    )
+    analyse_whatsapp_success_rate(whatsapp_df, engine=engine, db_path=db_path)
+
+
+def normalise(df):
+    """Sorts by the key (text) columns, row order of ties is not part of the output."""
+    key_columns = [
+        c for c in df.columns if df[c].dtype == object or df[c].dtype == "str"
+    ]
+    return df.sort_values(key_columns).reset_index(drop=True)
+
+
+def test_duckdb_engine_matches_pandas(tmp_path, monkeypatch):
+    # The analyses write to ../data relative to the working directory (SRC/)
+    data_dir = tmp_path / "data"
+    work_dir = tmp_path / "SRC"
+    data_dir.mkdir()
+    work_dir.mkdir()
+    monkeypatch.chdir(work_dir)
+    db_path = str(data_dir / "case.db")
+    build_case_db(db_path)
+
+    try:
+        duckdb_analysis.connect(db_path).close()
+    except duckdb.Error:
+        monkeypatch.setattr(duckdb_analysis, "connect", shim_connect)
+
+    run_analyses("pandas", db_path)
+    pandas_outputs = {p.name: pd.read_csv(p) for p in data_dir.glob("*.csv")}
+    for path in data_dir.glob("*.csv"):
+        path.unlink()
+
+    try:
+        run_analyses("duckdb", db_path)
+    finally:
+        duckdb_analysis.close_connections()
+    duckdb_outputs = {p.name: pd.read_csv(p) for p in data_dir.glob("*.csv")}
+
+    assert len(pandas_outputs) == 18
+    assert duckdb_outputs.keys() == pandas_outputs.keys()
+    for name, pandas_df in pandas_outputs.items():
+        pd.testing.assert_frame_equal(
+            normalise(duckdb_outputs[name]),
+            normalise(pandas_df),
+            check_dtype=False,
+            check_exact=False,
+            rtol=1e-9,
+            obj=name,
+        )
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+from utils.data_analysis import analyse_avg_handle_time_by_issue_type
+
+
+def test_missing_handle_times_are_left_out_of_distribution(tmp_path, monkeypatch):
+    # The analysis writes to ../data relative to the working directory (SRC/)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "SRC").mkdir()
+    monkeypatch.chdir(tmp_path / "SRC")
+
+    cases_df = pd.DataFrame(
+        {
+            "Id": ["c1", "c2"],
+            "Issue type": ["Directory", "Directory"],
+            "SESSION ID": ["s1", "s2"],
+        }
+    )
+    omni_df = pd.DataFrame({"Work Item Id": ["c1", "c2"], "Handle Time": [None, None]})
+    phone_df = pd.DataFrame(
+        {
+            "SESSION ID": ["s1", "s1", "s2", "s2"],
+            "HANDLE TIME": ["5:00", "-", None, "10:00"],
+        }
+    )
+
+    results = analyse_avg_handle_time_by_issue_type(cases_df, omni_df, phone_df)
+
+    # The averages still count missing handle times as 0 seconds
+    averages = results["avg_handle_time_per_issue_type"].set_index("Source")
+    assert averages.loc["Phone", "Handle Time Seconds"] == 225
+    assert averages.loc["Omni", "Handle Time Seconds"] == 0
+
+    # The distribution only uses the recorded handle times, omni has none
+    percentiles = results["handle_time_percentiles_per_issue_type"]
+    assert percentiles["Source"].tolist() == ["Phone"]
+    phone = percentiles.iloc[0]
+    assert phone["Count"] == 2
+    assert phone["Mean"] == 450
+    assert phone["P50"] == pytest.approx(300, rel=0.01)
+    histogram = results["handle_time_histogram_per_issue_type"].set_index("Bucket")
+    assert histogram.loc["0-60", "Count"] == 0
+    assert histogram["Count"].sum() == 2
@@ -0,0 +1,96 @@
+import os
+import pytest
+from utils import intent_router
+from utils.intent_router import IntentRouter, parse_help_sections
+
+# Queries about a problem with a documented topic, which need the LLM or an agent
+TOPIC_PROBLEM_QUERIES = [
+    "My vetting was rejected, can I appeal?",
+    "stop the direct debit",
+    "my direct debit failed, will my profile be removed?",
+    "My profile description was changed without my permission",
+    "I was vetted last year, how do I renew my membership?",
+]
+
+
+@pytest.fixture(scope="module")
+def instructions():
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(src_dir, "prompt_instructions.txt")) as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def router(instructions):
+    return IntentRouter(instructions)
+
+
+def test_answers_matched_by_title_not_order(instructions, router):
+    header, _, rest = instructions.partition("Help Documentation:")
+    sections = parse_help_sections(instructions)
+    closing = rest.strip().rsplit("\n\n", 1)[1]
+    reordered = (
+        header
+        + "Help Documentation:\n\n"
+        + "\n\n".join(f"-{title}\n{answer}" for title, answer in sections[::-1])
+        + "\n\n"
+        + closing
+    )
+    assert IntentRouter(reordered).answers == router.answers
+    assert router.answers["invoice"].startswith("Checkatrade invoices contain")
+
+
+def test_missing_section_raises(instructions):
+    with pytest.raises(ValueError):
+        IntentRouter(instructions.replace("Understanding my invoice", "Invoices"))
+
+
+@pytest.mark.parametrize(
+    "query, intent",
+    [
+        ("How do I update my profile description?", "profile_text"),
+        ("I never got the SMS to verify my ID", "vetting"),
+        ("How do I get more leads?", "getting_leads"),
+        ("When will the direct debit be taken?", "invoice"),
+    ],
+)
+def test_phrase_routes_to_documented_answer(router, query, intent):
+    decision = router.route(query)
+    assert decision["intent"] == intent
+    assert decision["method"] == "keyword"
+    assert decision["answer"] == router.answers[intent]
+
+
+def test_tfidf_routes_to_documented_answer(router):
+    if router.vectorizer is None:
+        pytest.skip("scikit-learn is not installed")
+    decision = router.route("what is the due date on my invoice")
+    assert (decision["intent"], decision["method"]) == ("invoice", "tfidf")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "I received no leads this month and want to cancel",
+        "how do i cancel my insurance claim",
+        "I need a job description",
+        "can I see who viewed my profile",
+        "hello",
+    ]
+    + TOPIC_PROBLEM_QUERIES,
+)
+def test_broad_or_escalation_queries_fall_back_to_llm(router, query):
+    decision = router.route(query)
+    assert decision["intent"] is None
+    assert decision["answer"] is None
+    assert decision["method"] == "llm"
+
+
+@pytest.mark.parametrize("query", TOPIC_PROBLEM_QUERIES)
+def test_topic_problems_fall_back_without_escalation_terms(
+    instructions, monkeypatch, query
+):
+    # Naming a topic must not be enough, even if an escalation term is missing
+    monkeypatch.setattr(intent_router, "ESCALATION_TERMS", ["escalate"])
+    decision = IntentRouter(instructions).route(query)
+    assert decision["intent"] is None
@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import pytest
+from utils.bot_metrics import BotMetricsStore
+from utils.intent_router import IntentRouter
+from utils.prompt_template import PromptTemplate, estimate_tokens
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def instructions():
+    with open(os.path.join(SRC_DIR, "prompt_instructions.txt")) as f:
+        return f.read()
+
+
+def test_prefix_is_identical_across_queries(instructions):
+    template = PromptTemplate(instructions)
+    prompts = [
+        template.render(query)[0]
+        for query in ["How do I get more leads?", "Why was I charged twice?"]
+    ]
+    prefix = f"{instructions}\n\n".encode()
+    for prompt in prompts:
+        assert prompt.encode()[: len(prefix)] == prefix
+    assert prompts[0].endswith("User Query: How do I get more leads?\n\nResponse:")
+
+
+def test_token_counter_only_counts_prefix(instructions):
+    calls = []
+
+    def token_counter(text):
+        calls.append(text)
+        return 1000
+
+    template = PromptTemplate(instructions, token_counter=token_counter)
+    for query in ["first query", "second query", "third query"]:
+        _, prompt_tokens = template.render(query)
+    assert calls == [template.prefix]
+    assert template.prefix_tokens == 1000
+    suffix = PromptTemplate.SUFFIX_TEMPLATE.format(user_query="third query")
+    assert prompt_tokens == 1000 + estimate_tokens(suffix)
+
+
+def test_over_budget_query(instructions):
+    template = PromptTemplate(instructions, max_prompt_tokens=8000)
+    prompt, prompt_tokens = template.render("x" * 40000)
+    assert prompt is None
+    assert prompt_tokens == template.prefix_tokens + estimate_tokens(
+        PromptTemplate.SUFFIX_TEMPLATE.format(user_query="x" * 40000)
+    )
+    assert prompt_tokens > 8000
+
+
+def test_over_budget_query_is_logged(instructions, tmp_path, monkeypatch):
+    pytest.importorskip("google.generativeai")
+    pytest.importorskip("dotenv")
+    import llm_prototype
+
+    def call_gemini(*args, **kwargs):
+        raise AssertionError("over budget prompts must not be sent to Gemini")
+
+    monkeypatch.setattr(llm_prototype, "call_gemini", call_gemini)
+    metrics_store = BotMetricsStore(str(tmp_path / "bot_metrics.db"))
+    template = PromptTemplate(instructions, max_prompt_tokens=10)
+
+    answer = llm_prototype.answer_query(
+        "I want to cancel my membership",
+        template,
+        IntentRouter(instructions),
+        metrics_store,
+    )
+
+    assert answer is None
+    with sqlite3.connect(metrics_store.db_path) as con:
+        rows = con.execute(
+            "SELECT status, route, estimated_prompt_tokens FROM requests"
+        ).fetchall()
+    _, prompt_tokens = template.render("I want to cancel my membership")
+    assert rows == [("over_budget", "llm", prompt_tokens)]
@@ -0,0 +1,73 @@
+import math
+import numpy as np
+import pytest
+from utils.quantile_sketch import QuantileSketch
+
+PERCENTILES = [0.5, 0.9, 0.99]
+
+
+@pytest.fixture
+def handle_times():
+    # Long tailed like real handle times, plus some zero durations
+    rng = np.random.default_rng(42)
+    values = rng.lognormal(mean=6, sigma=1.5, size=50000)
+    return np.concatenate([values, np.zeros(500)])
+
+
+@pytest.mark.parametrize("relative_accuracy", [0.01, 0.05])
+def test_quantiles_within_relative_accuracy(handle_times, relative_accuracy):
+    sketch = QuantileSketch(relative_accuracy=relative_accuracy).update(handle_times)
+    for q in PERCENTILES:
+        # The sketch returns the value at rank floor(q * (n - 1)), i.e. method="lower"
+        exact = np.quantile(handle_times, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(exact, rel=relative_accuracy)
+
+
+def test_merge_equals_single_pass(handle_times):
+    single = QuantileSketch().update(handle_times)
+    merged = QuantileSketch()
+    for chunk in np.array_split(handle_times, 7):
+        merged.merge(QuantileSketch().update(chunk))
+
+    assert merged.buckets == single.buckets
+    assert merged.histogram() == single.histogram()
+    assert merged.count == single.count
+    assert merged.zero_count == single.zero_count
+    assert (merged.min, merged.max) == (single.min, single.max)
+    assert merged.mean() == pytest.approx(single.mean())
+    for q in PERCENTILES:
+        assert merged.quantile(q) == single.quantile(q)
+
+
+def test_merge_rejects_different_settings():
+    with pytest.raises(ValueError):
+        QuantileSketch(relative_accuracy=0.01).merge(
+            QuantileSketch(relative_accuracy=0.02)
+        )
+
+
+def test_empty_sketch():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.mean() is None
+    assert all(count == 0 for _, count in sketch.histogram())
+
+
+def test_zero_values():
+    sketch = QuantileSketch().update([0, 0, 0, 120])
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1) == pytest.approx(120, rel=0.01)
+    assert sketch.histogram()[0] == ("0-60", 3)
+
+
+def test_negative_none_and_nan_are_ignored():
+    sketch = QuantileSketch().update([-5, None, math.nan, np.nan, 30, 90])
+    assert sketch.count == 2
+    assert sketch.mean() == 60
+    assert sketch.min == 30
+    assert sum(count for _, count in sketch.histogram()) == 2
+
+
+def test_invalid_quantile():
+    with pytest.raises(ValueError):
+        QuantileSketch().update([1, 2, 3]).quantile(1.5)
@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import pandas as pd
+
+import refresh_service
+from refresh_service import RefreshService
+
+
+def build_case_db(db_path):
+    con = sqlite3.connect(db_path)
+    pd.DataFrame(
+        {
+            "Id": ["c1", "c2", "c3"],
+            "Case Number": [1, 2, 3],
+            "Origin": ["Web", "Phone", "WhatsApp"],
+            "Status": ["Closed", "New", "Closed"],
+            "Issue type": ["Profile Text", "Directory", "Profile Text"],
+            "SESSION ID": ["s1", "s2", None],
+        }
+    ).to_sql("cases", con, index=False)
+    pd.DataFrame(
+        {
+            "SESSION ID": ["s1", "s2", "s2"],
+            "CAMPAIGN": ["x", "x", "x"],
+            "HANDLE TIME": ["00:05:00", "1:30", "-"],
+        }
+    ).to_sql("phone", con, index=False)
+    pd.DataFrame(
+        {
+            "Work Item Id": ["c1", "c3"],
+            "Queue name": ["q", "q"],
+            "Handle Time": [120.0, None],
+            "Status": ["Closed", "Closed"],
+        }
+    ).to_sql("email_web_whatsapp_community", con, index=False)
+    pd.DataFrame(
+        {
+            "Case Id": ["c3", "c3"],
+            "Agent Type": ["Bot", "Agent"],
+            "Status": ["x", "x"],
+            "Agent Message Count": [0, 2],
+        }
+    ).to_sql("whatsapp", con, index=False)
+    con.close()
+
+
+def make_service(tmp_path, monkeypatch):
+    # The analyses write to ../data relative to the working directory (SRC/)
+    data_dir = tmp_path / "data"
+    work_dir = tmp_path / "SRC"
+    data_dir.mkdir()
+    work_dir.mkdir()
+    monkeypatch.chdir(work_dir)
+    db_path = str(data_dir / "case.db")
+    build_case_db(db_path)
+    return RefreshService(db_path, poll_interval=0)
+
+
+def result_records(service, output_name):
+    return json.loads(service.get_result(output_name)[1])
+
+
+def test_refresh_reloads_only_changed_tables(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    assert sorted(service.check_once()) == sorted(refresh_service.ANALYSES)
+    assert (
+        result_records(service, "whatsapp_success_rate")[0]["Total Interactions"] == 1
+    )
+
+    loaded = []
+    load_data = refresh_service.load_data
+    monkeypatch.setattr(
+        refresh_service,
+        "load_data",
+        lambda db_path, table_name: loaded.append(table_name)
+        or load_data(db_path, table_name),
+    )
+    assert service.check_once() == []
+
+    # In-place update: same row count and rowids
+    con = sqlite3.connect(service.db_path)
+    con.execute(
+        'UPDATE whatsapp SET "Agent Message Count" = 1 WHERE "Agent Type" = \'Bot\''
+    )
+    con.commit()
+    con.close()
+
+    assert service.check_once() == ["join_counts", "whatsapp_success_rate"]
+    assert loaded == ["whatsapp"]
+    bot_row = result_records(service, "whatsapp_success_rate")[0]
+    assert bot_row["Successful Interactions (Message Count > 0)"] == 1
+
+
+def test_failed_analysis_keeps_previous_result(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    service.check_once()
+    etag, _ = service.get_result("whatsapp_success_rate")
+
+    # Results come from the returned data frames, not the CSV files
+    for path in (tmp_path / "data").glob("*.csv"):
+        path.unlink()
+    monkeypatch.setitem(
+        refresh_service.ANALYSES,
+        "whatsapp_success_rate",
+        ({"whatsapp"}, lambda dfs, db_path: None),
+    )
+    con = sqlite3.connect(service.db_path)
+    con.execute("INSERT INTO whatsapp VALUES ('c1', 'Bot', 'x', 5)")
+    con.commit()
+    con.close()
+
+    assert "whatsapp_success_rate" not in service.check_once()
+    assert service.get_result("whatsapp_success_rate")[0] == etag
+    assert result_records(service, "join_analysis_results")
+
+
+def test_same_length_edit_changes_served_result(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    service.check_once()
+
+    def phone_average(origin):
+        return next(
+            row["Handle Time Seconds"]
+            for row in result_records(service, "avg_handle_time_per_origin")
+            if row["Origin"] == origin and row["Source"] == "Phone"
+        )
+
+    assert phone_average("Web") == 300
+
+    # Same length and first character, only the content changes
+    con = sqlite3.connect(service.db_path)
+    con.execute(
+        """UPDATE phone SET "HANDLE TIME" = '00:09:00' WHERE "HANDLE TIME" = '00:05:00'"""
+    )
+    con.commit()
+    con.close()
+
+    assert "avg_handle_time" in service.check_once()
+    assert phone_average("Web") == 540
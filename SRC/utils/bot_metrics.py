@@ -0,0 +1,79 @@
+import sqlite3
+import time
+import os
+
+DEFAULT_METRICS_PATH = os.path.join("../data", "bot_metrics.db")
+
+
+class BotMetricsStore:
+    """
+    Local SQLite store of per-request bot metrics (route, token counts and latency),
+    used for capacity planning of the bot.
+    """
+
+    def __init__(self, db_path=DEFAULT_METRICS_PATH):
+        """
+        :param db_path: path of the SQLite metrics database, created if missing
+        :type db_path: str
+        """
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS requests (
+                    timestamp REAL,
+                    status TEXT,
+                    route TEXT,
+                    estimated_prompt_tokens INTEGER,
+                    prompt_tokens INTEGER,
+                    cached_tokens INTEGER,
+                    response_tokens INTEGER,
+                    latency_ms REAL
+                )
+                """)
+            # Databases created before the intent router have no route column
+            columns = [row[1] for row in con.execute("PRAGMA table_info(requests)")]
+            if "route" not in columns:
+                con.execute("ALTER TABLE requests ADD COLUMN route TEXT")
+
+    def log(
+        self,
+        status,
+        route="llm",
+        estimated_prompt_tokens=None,
+        prompt_tokens=None,
+        cached_tokens=None,
+        response_tokens=None,
+        latency_ms=None,
+    ):
+        """
+        Records one bot request.
+        :param status: outcome, e.g. 'ok', 'over_budget' or 'error'
+        :param route: 'llm', or the intent answered locally by the intent router
+        :param estimated_prompt_tokens: local estimate of the prompt size
+        :param prompt_tokens: prompt tokens reported by the provider
+        :param cached_tokens: prompt tokens served from the provider's cache
+        :param response_tokens: response tokens reported by the provider
+        :param latency_ms: request latency in milliseconds
+        """
+        try:
+            with sqlite3.connect(self.db_path) as con:
+                con.execute(
+                    """
+                    INSERT INTO requests (
+                        timestamp, status, route, estimated_prompt_tokens, prompt_tokens,
+                        cached_tokens, response_tokens, latency_ms
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        time.time(),
+                        status,
+                        route,
+                        estimated_prompt_tokens,
+                        prompt_tokens,
+                        cached_tokens,
+                        response_tokens,
+                        latency_ms,
+                    ),
+                )
+        except sqlite3.Error as e:
+            print(f"Error logging bot metrics: {e}")
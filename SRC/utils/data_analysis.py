@@ -1,9 +1,38 @@
 import pandas as pd
 from sqlalchemy import create_engine
 import os
+from utils.quantile_sketch import QuantileSketch
 
+HANDLE_TIME_PERCENTILES = [0.5, 0.9, 0.99]
+# Handle time in seconds before missing and '-' values are filled with 0 for the
+# averages. The percentiles and histograms are built from it, so missing handle times
+# are left out instead of counted as 0 second calls.
+RECORDED_HANDLE_TIME = "Recorded Handle Time Seconds"
+ENGINES = ["pandas", "duckdb"]
 
-def load_data(db_path, table_name, limit=None):
+
+def use_duckdb(engine, db_path):
+    """
+    Checks the engine argument of the analysis functions.
+    :param engine: 'pandas' (eager, in memory) or 'duckdb' (lazy, multi-threaded, reads case.db directly)
+    :param db_path: path to the SQLite database file, required for 'duckdb'
+    :return: True if the DuckDB engine should be used
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+    if engine == "duckdb" and db_path is None:
+        raise ValueError("db_path is required for the duckdb engine")
+    return engine == "duckdb"
+
+
+def load_data(
+    db_path,
+    table_name,
+    limit=None,
+    quality_report=None,
+    quarantine=False,
+    chunksize=50000,
+):
     """
     Loads data from SQLite database into Pandas df.
 
@@ -13,6 +42,14 @@ def load_data(db_path, table_name, limit=None):
     :type table_name: str
     :param limit: The number of rows to load, defaults to None (load all).
     :type limit: int or None
+    :param quality_report: If given, each chunk is validated as it is read and the counts
+        are recorded in this report, defaults to None (no validation).
+    :type quality_report: utils.data_quality.DataQualityReport or None
+    :param quarantine: Drop rows that fail validation (unparseable durations, duplicate IDs)
+        and save them to ../data/quarantine_<table_name>.csv, defaults to False.
+    :type quarantine: bool
+    :param chunksize: The number of rows read per chunk when validating, defaults to 50000.
+    :type chunksize: int
     :return: The loaded data as a Pandas DataFrame, or None if an error occurs
     :rtype: pandas.DataFrame
     """
@@ -22,7 +59,35 @@ def load_data(db_path, table_name, limit=None):
         query = f"SELECT * FROM {table_name}"
         if limit is not None:
             query += f" LIMIT {limit}"
-        df = pd.read_sql(query, engine)
+        if quality_report is None:
+            df = pd.read_sql(query, engine)
+            return df
+
+        # Validate chunk by chunk while reading, so no extra pass over the data
+        kept_chunks = []
+        quarantined_chunks = []
+        for chunk in pd.read_sql(query, engine, chunksize=chunksize):
+            bad_rows = quality_report.check_chunk(table_name, chunk)
+            if quarantine:
+                quarantined_chunks.append(chunk[bad_rows])
+                chunk = chunk[~bad_rows]
+            kept_chunks.append(chunk)
+        if not kept_chunks:
+            return pd.read_sql(query, engine)
+        # Each chunk infers its own dtypes (an all null chunk comes back as object),
+        # so infer again to get the same dtypes as a single read
+        df = pd.concat(kept_chunks, ignore_index=True).infer_objects()
+
+        if quarantine:
+            quarantined_df = pd.concat(quarantined_chunks, ignore_index=True)
+            output_path = os.path.join("../data", f"quarantine_{table_name}.csv")
+            try:
+                quarantined_df.to_csv(output_path, index=False)
+                print(
+                    f"{len(quarantined_df)} rows of {table_name} quarantined to: {output_path}"
+                )
+            except Exception as e:
+                print(f"Error saving quarantined {table_name} rows to CSV: {e}")
         return df
     except Exception as e:
         print(f"Error loading data from {table_name}: {e}")
@@ -31,13 +96,20 @@ def load_data(db_path, table_name, limit=None):
         engine.dispose()
 
 
-def get_counts(df, column_name):
+def get_counts(df, column_name, engine="pandas", db_path=None):
     """Calculates and prints value counts and percentage total for a specified column and saves to csv.
 
     :param df: pandas dataframe
     :param column_name: name of the column to be counted
+    :param engine: 'pandas' (default) or 'duckdb' to run the analysis in DuckDB against db_path
+    :param db_path: path to the SQLite database file, only used by the duckdb engine
     :return: count of the values of the column and percentage of total
     """
+    if use_duckdb(engine, db_path):
+        from utils import duckdb_analysis
+
+        return duckdb_analysis.get_counts(db_path, column_name)
+
     if df is not None and column_name in df.columns:
         counts = df[column_name].value_counts()
         total = len(df)
@@ -77,16 +149,113 @@ def time_to_seconds(time_str):
     return None
 
 
-def analyse_avg_handle_time(cases_df, omni_df, phone_df):
+def build_handle_time_sketches(df, group_columns, sketches=None):
+    """
+    Builds a quantile sketch of RECORDED_HANDLE_TIME per group. Passing in the sketches
+    from a previous chunk merges the new values into them, so large tables can be
+    processed in chunks (or in parallel and merged) without holding every value.
+    :param df: joined data frame containing the group columns and RECORDED_HANDLE_TIME
+    :param group_columns: column name or list of column names to group by
+    :param sketches: existing dict of group key -> QuantileSketch to update, defaults to None
+    :return: dict of group key -> QuantileSketch
     """
-    Calculates and saves as CSV the average handle time per origin and status.
+    sketches = {} if sketches is None else sketches
+    for key, group in df.groupby(group_columns)[RECORDED_HANDLE_TIME]:
+        key = key if isinstance(key, tuple) else (key,)
+        chunk_sketch = QuantileSketch().update(group)
+        if key in sketches:
+            sketches[key].merge(chunk_sketch)
+        else:
+            sketches[key] = chunk_sketch
+    return sketches
+
+
+def analyse_handle_time_distribution(joined_dfs, group_columns, output_name):
+    """
+    Calculates and saves as CSV the handle time percentiles (p50/p90/p99) and histogram per group.
+    :param joined_dfs: dict of source name (e.g. 'Omni', 'Phone') -> joined data frame
+        containing the group columns and RECORDED_HANDLE_TIME
+    :param group_columns: list of column names to group by
+    :param output_name: suffix for the output files, e.g. 'origin' writes
+        handle_time_percentiles_per_origin.csv and handle_time_histogram_per_origin.csv
+    :return: percentiles data frame and histogram data frame
+    """
+    sketches_by_source = {
+        source: build_handle_time_sketches(joined_df, group_columns)
+        for source, joined_df in joined_dfs.items()
+    }
+    return save_handle_time_distribution(sketches_by_source, group_columns, output_name)
+
+
+def save_handle_time_distribution(sketches_by_source, group_columns, output_name):
+    """
+    Saves as CSV the handle time percentiles (p50/p90/p99) and histogram of built sketches.
+    :param sketches_by_source: dict of source name -> dict of group key -> QuantileSketch
+    :param group_columns: list of the column names making up the group keys
+    :param output_name: suffix for the output files, see analyse_handle_time_distribution
+    :return: percentiles data frame and histogram data frame
+    """
+    percentile_rows = []
+    histogram_rows = []
+    for source, sketches in sketches_by_source.items():
+        for key, sketch in sketches.items():
+            if sketch.count == 0:
+                # Group without any recorded handle time
+                continue
+            group = dict(zip(group_columns, key))
+            percentile_row = {**group, "Source": source, "Count": sketch.count}
+            percentile_row["Mean"] = sketch.mean()
+            for q in HANDLE_TIME_PERCENTILES:
+                percentile_row[f"P{round(q * 100)}"] = sketch.quantile(q)
+            percentile_rows.append(percentile_row)
+            for bucket, bucket_count in sketch.histogram():
+                histogram_rows.append(
+                    {**group, "Source": source, "Bucket": bucket, "Count": bucket_count}
+                )
+
+    percentiles_df = pd.DataFrame(percentile_rows)
+    histogram_df = pd.DataFrame(histogram_rows)
+    if not percentiles_df.empty:
+        # Sort by tail handle time (longest to shortest)
+        percentiles_df = percentiles_df.sort_values(by="P99", ascending=False)
+
+    output_path_percentiles = os.path.join(
+        "../data", f"handle_time_percentiles_per_{output_name}.csv"
+    )
+    output_path_histogram = os.path.join(
+        "../data", f"handle_time_histogram_per_{output_name}.csv"
+    )
+    try:
+        percentiles_df.to_csv(output_path_percentiles, index=False)
+        histogram_df.to_csv(output_path_histogram, index=False)
+        print(
+            f"Handle time percentiles and histogram per {output_name} saved to: "
+            f"{output_path_percentiles}, {output_path_histogram}"
+        )
+    except Exception as e:
+        print(f"Error saving handle time distribution per {output_name} to CSV: {e}")
+    return percentiles_df, histogram_df
+
+
+def analyse_avg_handle_time(cases_df, omni_df, phone_df, engine="pandas", db_path=None):
+    """
+    Calculates and saves as CSV the average handle time per origin and status,
+    plus handle time percentiles and histograms per origin and status.
     :param cases_df: data frame of the cases table
     :param omni_df: data frame of the salesforce table
     :param phone_df: data frame of the phone call table
-    :return: CSV of average time to handle by origin and by status.
+    :param engine: 'pandas' (default) or 'duckdb' to run the analysis in DuckDB against db_path
+    :param db_path: path to the SQLite database file, only used by the duckdb engine
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
     """
+    if use_duckdb(engine, db_path):
+        from utils import duckdb_analysis
+
+        return duckdb_analysis.analyse_avg_handle_time(db_path)
+
     if cases_df is not None and omni_df is not None and phone_df is not None:
-        omni_df["Handle Time Seconds"] = omni_df["Handle Time"].fillna(
+        omni_df[RECORDED_HANDLE_TIME] = omni_df["Handle Time"]
+        omni_df["Handle Time Seconds"] = omni_df[RECORDED_HANDLE_TIME].fillna(
             0
         )  # Fill NaN with 0 for aggregation
         omni_handle_time_origin = pd.merge(
@@ -113,8 +282,9 @@ def analyse_avg_handle_time(cases_df, omni_df, phone_df):
         )
 
         # Prepare handle time in seconds for phone data
-        phone_df["Handle Time Seconds"] = (
-            phone_df["HANDLE TIME"].apply(time_to_seconds).fillna(0)
+        phone_df[RECORDED_HANDLE_TIME] = phone_df["HANDLE TIME"].apply(time_to_seconds)
+        phone_df["Handle Time Seconds"] = phone_df[RECORDED_HANDLE_TIME].fillna(
+            0
         )  # Fill NaN with 0
         phone_handle_time_origin = pd.merge(
             cases_df, phone_df, on="SESSION ID", how="inner"
@@ -172,31 +342,63 @@ def analyse_avg_handle_time(cases_df, omni_df, phone_df):
         except Exception as e:
             print(f"Error saving average handle time per status to CSV: {e}")
 
+        # Handle time percentiles and histograms per origin and status
+        origin_percentiles_df, origin_histogram_df = analyse_handle_time_distribution(
+            {"Omni": omni_handle_time_origin, "Phone": phone_handle_time_origin},
+            ["Origin"],
+            "origin",
+        )
+        status_percentiles_df, status_histogram_df = analyse_handle_time_distribution(
+            {
+                "Omni": omni_handle_time_origin.rename(columns={"Status_x": "Status"}),
+                "Phone": phone_handle_time_origin,
+            },
+            ["Status"],
+            "status",
+        )
+
+        return {
+            "avg_handle_time_per_origin": avg_handle_time_origin_sorted,
+            "avg_handle_time_per_status": avg_handle_time_status_sorted,
+            "handle_time_percentiles_per_origin": origin_percentiles_df,
+            "handle_time_histogram_per_origin": origin_histogram_df,
+            "handle_time_percentiles_per_status": status_percentiles_df,
+            "handle_time_histogram_per_status": status_histogram_df,
+        }
+
     else:
         print(
             "Error: One or more of the required DataFrames (cases_df, omni_df, phone_df) are None."
         )
 
 
-def analyse_join_counts(db_path):
+def analyse_join_counts(db_path, engine="pandas"):
     """
     Analyses how many rows in the 'cases' table have joins with other tables.
     So we can see if multiple channels are used in a singular case and the volume.
+    :param db_path: path to the SQLite database file
+    :param engine: 'pandas' (default) or 'duckdb' to run the analysis in DuckDB
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
     """
+    if use_duckdb(engine, db_path):
+        from utils import duckdb_analysis
+
+        return duckdb_analysis.analyse_join_counts(db_path)
+
     database_url = f"sqlite:///{db_path}"
-    engine = create_engine(database_url)
+    db_engine = create_engine(database_url)
     join_results = {}
     try:
         cases_df = pd.read_sql(
             'SELECT "Id", "Case Number", "Origin", "Status", "SESSION ID" FROM cases',
-            engine,
+            db_engine,
         )
-        phone_df = pd.read_sql('SELECT "SESSION ID" FROM phone', engine)
+        phone_df = pd.read_sql('SELECT "SESSION ID" FROM phone', db_engine)
         omni_df = pd.read_sql(
             'SELECT "Work Item Id", "Handle Time" FROM email_web_whatsapp_community',
-            engine,
+            db_engine,
         )
-        whatsapp_df = pd.read_sql('SELECT "Case Id" FROM whatsapp', engine)
+        whatsapp_df = pd.read_sql('SELECT "Case Id" FROM whatsapp', db_engine)
 
         # Phone to Case join count
         phone_join_df = pd.merge(cases_df, phone_df, on="SESSION ID", how="inner")
@@ -306,19 +508,28 @@ def analyse_join_counts(db_path):
         except Exception as e:
             print(f"Error saving join analysis results to CSV: {e}")
 
+        return {"join_analysis_results": join_results_df}
+
     except Exception as e:
         print(f"Error during join analysis: {e}")
     finally:
-        engine.dispose()
+        db_engine.dispose()
 
 
-def analyse_avg_phone_entries(cases_df, phone_df):
+def analyse_avg_phone_entries(cases_df, phone_df, engine="pandas", db_path=None):
     """
     Calculates and saves to CSV the average number of phone entries per case (overall and for cases with >1 call).
     :param cases_df: cases dataframe
     :param phone_df: phone call dataframe
-    :return: results data frame and saves to csv
+    :param engine: 'pandas' (default) or 'duckdb' to run the analysis in DuckDB against db_path
+    :param db_path: path to the SQLite database file, only used by the duckdb engine
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
     """
+    if use_duckdb(engine, db_path):
+        from utils import duckdb_analysis
+
+        return duckdb_analysis.analyse_avg_phone_entries(db_path)
+
     if cases_df is not None and phone_df is not None:
         # Join cases and phone tables
         cases_phone_joined = pd.merge(cases_df, phone_df, on="SESSION ID", how="inner")
@@ -370,18 +581,29 @@ def analyse_avg_phone_entries(cases_df, phone_df):
         except Exception as e:
             print(f"Error saving average phone entries analysis to CSV: {e}")
 
+        return {"avg_phone_entries_analysis": results_df}
+
     else:
         print("Error: cases_df or phone_df is None.")
 
 
-def analyse_avg_handle_time_by_issue_type(cases_df, omni_df, phone_df):
+def analyse_avg_handle_time_by_issue_type(
+    cases_df, omni_df, phone_df, engine="pandas", db_path=None
+):
     """
-    Calculates and saves as CSV the average handle time per issue type.
+    Calculates and saves as CSV the average handle time per issue type, plus percentiles and histograms.
     :param cases_df: data frame of the cases table (must contain 'Issue type' and 'Id' columns)
     :param omni_df: data frame of the salesforce table (must contain 'Work Item Id' and 'Handle Time' columns)
     :param phone_df: data frame of the phone call table (must contain 'SESSION ID' and 'HANDLE TIME' columns)
-    :return: None
+    :param engine: 'pandas' (default) or 'duckdb' to run the analysis in DuckDB against db_path
+    :param db_path: path to the SQLite database file, only used by the duckdb engine
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
     """
+    if use_duckdb(engine, db_path):
+        from utils import duckdb_analysis
+
+        return duckdb_analysis.analyse_avg_handle_time_by_issue_type(db_path)
+
     if (
         cases_df is not None
         and omni_df is not None
@@ -389,11 +611,10 @@ def analyse_avg_handle_time_by_issue_type(cases_df, omni_df, phone_df):
         and "Issue type" in cases_df.columns
     ):
         # Prepare handle time in seconds for omni data
-        omni_df["Handle Time Seconds"] = (
-            omni_df["Handle Time"]
-            .apply(lambda x: time_to_seconds(x) if pd.notna(x) else None)
-            .fillna(0)
+        omni_df[RECORDED_HANDLE_TIME] = omni_df["Handle Time"].apply(
+            lambda x: time_to_seconds(x) if pd.notna(x) else None
         )
+        omni_df["Handle Time Seconds"] = omni_df[RECORDED_HANDLE_TIME].fillna(0)
         omni_issue_handle_time = pd.merge(
             cases_df, omni_df, left_on="Id", right_on="Work Item Id", how="inner"
         )
@@ -405,11 +626,10 @@ def analyse_avg_handle_time_by_issue_type(cases_df, omni_df, phone_df):
         avg_handle_time_issue_omni["Source"] = "Omni"
 
         # Prepare handle time in seconds for phone data
-        phone_df["Handle Time Seconds"] = (
-            phone_df["HANDLE TIME"]
-            .apply(lambda x: time_to_seconds(x) if pd.notna(x) else None)
-            .fillna(0)
+        phone_df[RECORDED_HANDLE_TIME] = phone_df["HANDLE TIME"].apply(
+            lambda x: time_to_seconds(x) if pd.notna(x) else None
         )
+        phone_df["Handle Time Seconds"] = phone_df[RECORDED_HANDLE_TIME].fillna(0)
         phone_issue_handle_time = pd.merge(
             cases_df, phone_df, left_on="SESSION ID", right_on="SESSION ID", how="inner"
         )
@@ -440,21 +660,44 @@ def analyse_avg_handle_time_by_issue_type(cases_df, omni_df, phone_df):
         except Exception as e:
             print(f"Error saving average handle time per issue type to CSV: {e}")
 
+        # Handle time percentiles and histograms per issue type
+        percentiles_df, histogram_df = analyse_handle_time_distribution(
+            {"Omni": omni_issue_handle_time, "Phone": phone_issue_handle_time},
+            ["Issue type"],
+            "issue_type",
+        )
+
+        return {
+            "avg_handle_time_per_issue_type": avg_handle_time_issue_sorted,
+            "handle_time_percentiles_per_issue_type": percentiles_df,
+            "handle_time_histogram_per_issue_type": histogram_df,
+        }
+
     else:
         print(
             "Error: One or more of the required DataFrames are None or missing necessary columns for issue type analysis."
         )
 
 
-def analyse_handle_time_issue_origin_counts(cases_df, omni_df, phone_df):
+def analyse_handle_time_issue_origin_counts(
+    cases_df, omni_df, phone_df, engine="pandas", db_path=None
+):
     """
-    Calculates and saves as CSV the average handle time, counts per issue type and origin.
+    Calculates and saves as CSV the average handle time, counts per issue type and origin,
+    plus percentiles and histograms per issue type and origin.
     :param cases_df: data frame of the cases table (must contain 'Issue type', 'Id', and 'Origin' columns)
     :param omni_df: data frame of the salesforce table (must contain 'Work Item Id' and 'Handle Time' columns)
     :param phone_df: data frame of the phone call table (must contain 'SESSION ID' and 'HANDLE TIME' columns)
     :param output_dir: directory to save the CSV file
-    :return: None
+    :param engine: 'pandas' (default) or 'duckdb' to run the analysis in DuckDB against db_path
+    :param db_path: path to the SQLite database file, only used by the duckdb engine
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
     """
+    if use_duckdb(engine, db_path):
+        from utils import duckdb_analysis
+
+        return duckdb_analysis.analyse_handle_time_issue_origin_counts(db_path)
+
     if (
         cases_df is not None
         and omni_df is not None
@@ -465,11 +708,10 @@ def analyse_handle_time_issue_origin_counts(cases_df, omni_df, phone_df):
     ):
 
         # Prepare handle time in seconds for omni data
-        omni_df["Handle Time Seconds"] = (
-            omni_df["Handle Time"]
-            .apply(lambda x: time_to_seconds(x) if pd.notna(x) else None)
-            .fillna(0)
+        omni_df[RECORDED_HANDLE_TIME] = omni_df["Handle Time"].apply(
+            lambda x: time_to_seconds(x) if pd.notna(x) else None
         )
+        omni_df["Handle Time Seconds"] = omni_df[RECORDED_HANDLE_TIME].fillna(0)
         omni_issue_origin_handle_time = pd.merge(
             cases_df, omni_df, left_on="Id", right_on="Work Item Id", how="inner"
         )
@@ -483,11 +725,10 @@ def analyse_handle_time_issue_origin_counts(cases_df, omni_df, phone_df):
         avg_handle_time_omni["Source"] = "Omni"
 
         # Prepare handle time in seconds for phone data
-        phone_df["Handle Time Seconds"] = (
-            phone_df["HANDLE TIME"]
-            .apply(lambda x: time_to_seconds(x) if pd.notna(x) else None)
-            .fillna(0)
+        phone_df[RECORDED_HANDLE_TIME] = phone_df["HANDLE TIME"].apply(
+            lambda x: time_to_seconds(x) if pd.notna(x) else None
         )
+        phone_df["Handle Time Seconds"] = phone_df[RECORDED_HANDLE_TIME].fillna(0)
         phone_issue_origin_handle_time = pd.merge(
             cases_df, phone_df, left_on="SESSION ID", right_on="SESSION ID", how="inner"
         )
@@ -533,20 +774,43 @@ def analyse_handle_time_issue_origin_counts(cases_df, omni_df, phone_df):
                 f"Error saving average handle time, counts per issue type and origin to CSV: {e}"
             )
 
+        # Handle time percentiles and histograms per issue type and origin
+        percentiles_df, histogram_df = analyse_handle_time_distribution(
+            {
+                "Omni": omni_issue_origin_handle_time,
+                "Phone": phone_issue_origin_handle_time,
+            },
+            ["Issue type", "Origin"],
+            "issue_type_origin",
+        )
+
+        return {
+            "avg_handle_time_issue_origin_counts": merged_df_sorted,
+            "handle_time_percentiles_per_issue_type_origin": percentiles_df,
+            "handle_time_histogram_per_issue_type_origin": histogram_df,
+        }
+
     else:
         print(
             "Error: One or more of the required DataFrames are None or missing necessary columns for this analysis."
         )
 
 
-def analyse_whatsapp_success_rate(whatsapp_df):
+def analyse_whatsapp_success_rate(whatsapp_df, engine="pandas", db_path=None):
     """
     Calculates the success rate of bot vs. human agents in the provided whatsapp DataFrame
     based on whether the message count is greater than 0.
 
     :param whatsapp_df: pandas DataFrame of the whatsapp table.
-    :return: None
+    :param engine: 'pandas' (default) or 'duckdb' to run the analysis in DuckDB against db_path
+    :param db_path: path to the SQLite database file, only used by the duckdb engine
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
     """
+    if use_duckdb(engine, db_path):
+        from utils import duckdb_analysis
+
+        return duckdb_analysis.analyse_whatsapp_success_rate(db_path)
+
     if whatsapp_df is None:
         print("Error: whatsapp_df is None.")
         return
@@ -612,5 +876,7 @@ def analyse_whatsapp_success_rate(whatsapp_df):
         except Exception as e:
             print(f"Error saving WhatsApp success rate analysis to CSV: {e}")
 
+        return {"whatsapp_success_rate": success_rate_df}
+
     except Exception as e:
         print(f"Error during WhatsApp success rate analysis: {e}")
@@ -0,0 +1,173 @@
+import pandas as pd
+import numbers
+import os
+
+# Per-table validation rules:
+#   id_columns: columns expected to be unique
+#   duration_columns: columns parsed with time_to_seconds
+#   foreign_keys: column -> (parent table, parent column) it should join to
+TABLE_RULES = {
+    "cases": {
+        "id_columns": ["Id", "Case Number"],
+        "duration_columns": [],
+        "foreign_keys": {},
+    },
+    "phone": {
+        "id_columns": [],
+        "duration_columns": ["HANDLE TIME"],
+        "foreign_keys": {"SESSION ID": ("cases", "SESSION ID")},
+    },
+    "email_web_whatsapp_community": {
+        "id_columns": [],
+        "duration_columns": ["Handle Time"],
+        "foreign_keys": {"Work Item Id": ("cases", "Id")},
+    },
+    "whatsapp": {
+        "id_columns": [],
+        "duration_columns": [],
+        "foreign_keys": {"Case Id": ("cases", "Id")},
+    },
+}
+
+
+def is_valid_duration(value):
+    """
+    Checks whether a handle time value can be converted by time_to_seconds.
+    :param value: raw handle time (HH:MM:SS / MM:SS / SS string or a number)
+    :return: True if parseable, False otherwise. Nulls and '-' are counted separately and return True.
+    """
+    if value is None or isinstance(value, numbers.Number):
+        return True
+    if isinstance(value, str):
+        if value == "-":
+            return True
+        parts = value.split(":")
+        # isdecimal, not isdigit: int() rejects digits like '²' that isdigit accepts
+        return len(parts) <= 3 and all(part.strip().isdecimal() for part in parts)
+    return False
+
+
+class DataQualityReport:
+    """
+    Collects data quality counts while tables are being loaded, so validation happens
+    chunk by chunk during the read rather than as a separate pass over the data.
+    Orphan keys are resolved once all tables have been loaded.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self._seen_ids = {}
+        self._key_values = {}
+
+    def _increment(self, table_name, column_name, check, amount):
+        key = (table_name, column_name, check)
+        self.counts[key] = self.counts.get(key, 0) + int(amount)
+
+    def check_chunk(self, table_name, chunk):
+        """
+        Validates a chunk of a table and records the counts.
+        :param table_name: name of the table the chunk was read from
+        :param chunk: pandas DataFrame chunk
+        :return: boolean Series marking rows that should be quarantined
+        """
+        rules = TABLE_RULES.get(
+            table_name, {"id_columns": [], "duration_columns": [], "foreign_keys": {}}
+        )
+        bad_rows = pd.Series(False, index=chunk.index)
+        self._increment(table_name, "*", "rows", len(chunk))
+
+        for column_name in chunk.columns:
+            self._increment(
+                table_name, column_name, "nulls", chunk[column_name].isna().sum()
+            )
+            self._increment(
+                table_name,
+                column_name,
+                "dash_sentinels",
+                (chunk[column_name] == "-").sum(),
+            )
+
+        for column_name in rules["duration_columns"]:
+            if column_name in chunk.columns:
+                unparseable = ~chunk[column_name].map(is_valid_duration)
+                self._increment(
+                    table_name, column_name, "unparseable_durations", unparseable.sum()
+                )
+                bad_rows |= unparseable
+
+        for column_name in rules["id_columns"]:
+            if column_name in chunk.columns:
+                seen = self._seen_ids.setdefault((table_name, column_name), set())
+                ids = chunk[column_name]
+                duplicated = ids.duplicated() | ids.isin(seen)
+                duplicated &= ids.notna()
+                self._increment(
+                    table_name, column_name, "duplicate_ids", duplicated.sum()
+                )
+                seen.update(ids.dropna())
+                bad_rows |= duplicated
+
+        # Keep the distinct key values needed for the orphan check
+        for column_name in rules["foreign_keys"]:
+            if column_name in chunk.columns:
+                self._key_values.setdefault((table_name, column_name), set()).update(
+                    chunk[column_name].dropna()
+                )
+        for child_rules in TABLE_RULES.values():
+            for parent_table, parent_column in child_rules["foreign_keys"].values():
+                if parent_table == table_name and parent_column in chunk.columns:
+                    self._key_values.setdefault(
+                        (table_name, parent_column), set()
+                    ).update(chunk[parent_column].dropna())
+
+        return bad_rows
+
+    def orphan_counts(self):
+        """
+        Counts distinct foreign key values with no matching parent row (e.g. phone SESSION ID with no case).
+        Only tables that have been loaded are compared.
+        :return: dict of (table, column) -> number of orphan keys
+        """
+        orphans = {}
+        for table_name, rules in TABLE_RULES.items():
+            for column_name, (parent_table, parent_column) in rules[
+                "foreign_keys"
+            ].items():
+                child_keys = self._key_values.get((table_name, column_name))
+                parent_keys = self._key_values.get((parent_table, parent_column))
+                if child_keys is not None and parent_keys is not None:
+                    orphans[(table_name, column_name)] = len(child_keys - parent_keys)
+        return orphans
+
+    def to_dataframe(self):
+        """
+        :return: the report as a DataFrame with Table, Column, Check and Count columns
+        """
+        rows = [
+            {"Table": table_name, "Column": column_name, "Check": check, "Count": count}
+            for (table_name, column_name, check), count in self.counts.items()
+        ]
+        rows += [
+            {
+                "Table": table_name,
+                "Column": column_name,
+                "Check": "orphan_keys",
+                "Count": count,
+            }
+            for (table_name, column_name), count in self.orphan_counts().items()
+        ]
+        return pd.DataFrame(rows, columns=["Table", "Column", "Check", "Count"])
+
+    def save(self, output_path=os.path.join("../data", "data_quality_report.csv")):
+        """
+        Saves the report to CSV.
+        :param output_path: path of the CSV file, defaults to ../data/data_quality_report.csv
+        :return: the report DataFrame
+        """
+        report_df = self.to_dataframe()
+        try:
+            report_df.to_csv(output_path, index=False)
+            print(f"\nData quality report saved to: {output_path}")
+        except Exception as e:
+            print(f"Error saving data quality report to CSV: {e}")
+        return report_df
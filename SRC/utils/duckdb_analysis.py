@@ -0,0 +1,458 @@
+import duckdb
+import os
+from utils.data_analysis import save_handle_time_distribution
+from utils.quantile_sketch import QuantileSketch
+
+# case.db is read through DuckDB's sqlite extension. INSTALL downloads it from
+# extensions.duckdb.org on first use, so the first run needs network access (or the
+# extension installed beforehand with `INSTALL sqlite` / `duckdb -c "INSTALL sqlite"`).
+
+# Mirrors time_to_seconds: HH:MM:SS / MM:SS / SS strings or numbers. recorded_seconds
+# keeps '-' and nulls as NULL (RECORDED_HANDLE_TIME, used by the percentiles and
+# histograms), to_seconds turns them into 0 like the fillna(0) of the averages.
+TO_SECONDS_MACRO = """
+CREATE OR REPLACE TEMP MACRO recorded_seconds(t) AS
+    CASE
+        WHEN t IS NULL OR CAST(t AS VARCHAR) = '-' THEN NULL
+        WHEN len(string_split(CAST(t AS VARCHAR), ':')) = 3 THEN
+            TRY_CAST(string_split(CAST(t AS VARCHAR), ':')[1] AS DOUBLE) * 3600
+            + TRY_CAST(string_split(CAST(t AS VARCHAR), ':')[2] AS DOUBLE) * 60
+            + TRY_CAST(string_split(CAST(t AS VARCHAR), ':')[3] AS DOUBLE)
+        WHEN len(string_split(CAST(t AS VARCHAR), ':')) = 2 THEN
+            TRY_CAST(string_split(CAST(t AS VARCHAR), ':')[1] AS DOUBLE) * 60
+            + TRY_CAST(string_split(CAST(t AS VARCHAR), ':')[2] AS DOUBLE)
+        ELSE TRY_CAST(CAST(t AS VARCHAR) AS DOUBLE)
+    END;
+CREATE OR REPLACE TEMP MACRO to_seconds(t) AS COALESCE(recorded_seconds(t), 0);
+"""
+
+# Joins use IS NOT DISTINCT FROM because pandas merges match null keys with each other,
+# keeping the output identical to the pandas engine.
+OMNI_JOIN = """
+FROM case_db.cases c
+JOIN case_db.email_web_whatsapp_community o
+    ON c."Id" IS NOT DISTINCT FROM o."Work Item Id"
+"""
+PHONE_JOIN = """
+FROM case_db.cases c
+JOIN case_db.phone p
+    ON c."SESSION ID" IS NOT DISTINCT FROM p."SESSION ID"
+"""
+
+
+def connect(db_path, memory_limit=None, temp_directory=None):
+    """
+    Opens an in-memory DuckDB connection with the SQLite database attached read only as 'case_db'.
+    DuckDB runs queries on all cores and spills to temp_directory when memory_limit is reached.
+
+    :param db_path: The path to the SQLite database file.
+    :type db_path: str
+    :param memory_limit: DuckDB memory limit, e.g. '4GB', defaults to None (DuckDB default).
+    :type memory_limit: str or None
+    :param temp_directory: Directory used to spill to disk, defaults to None (DuckDB default).
+    :type temp_directory: str or None
+    :return: DuckDB connection
+    """
+    con = duckdb.connect()
+    if memory_limit is not None:
+        con.execute(f"SET memory_limit = '{memory_limit}'")
+    if temp_directory is not None:
+        con.execute(f"SET temp_directory = '{temp_directory}'")
+    con.execute("INSTALL sqlite")
+    con.execute("LOAD sqlite")
+    con.execute(f"ATTACH '{db_path}' AS case_db (TYPE sqlite, READ_ONLY)")
+    con.execute(TO_SECONDS_MACRO)
+    return con
+
+
+# One connection per database for the whole run, so INSTALL/ATTACH only happen once
+_connections = {}
+
+
+def get_connection(db_path):
+    """
+    Returns the DuckDB connection for db_path, opening it with connect() on first use.
+    :param db_path: The path to the SQLite database file.
+    :return: DuckDB connection
+    """
+    if db_path not in _connections:
+        _connections[db_path] = connect(db_path)
+    return _connections[db_path]
+
+
+def close_connections():
+    """Closes the connections opened by get_connection()."""
+    for con in _connections.values():
+        con.close()
+    _connections.clear()
+
+
+def save_csv(df, file_name, description, index=False):
+    """
+    Saves a result data frame to ../data and prints where it was saved.
+    :param df: result data frame
+    :param file_name: name of the CSV file
+    :param description: description used in the printed messages
+    :param index: whether to write the index, defaults to False
+    """
+    output_path = os.path.join("../data", file_name)
+    try:
+        df.to_csv(output_path, index=index)
+        print(f"\n{description} saved to: {output_path}")
+    except Exception as e:
+        print(f"Error saving {description} to CSV: {e}")
+
+
+def get_counts(db_path, column_name):
+    """
+    DuckDB version of data_analysis.get_counts.
+    :param db_path: The path to the SQLite database file.
+    :param column_name: name of the column of the cases table to be counted
+    :return: count of the values of the column and percentage of total
+    """
+    try:
+        con = get_connection(db_path)
+        counts_df = con.execute(f"""
+            SELECT "{column_name}", COUNT(*) AS "Count",
+                COUNT(*) / (SELECT COUNT(*) FROM case_db.cases) * 100 AS "Percentage"
+            FROM case_db.cases
+            WHERE "{column_name}" IS NOT NULL
+            GROUP BY 1
+            ORDER BY "Count" DESC
+            """).df()
+        counts_df = counts_df.set_index(column_name)
+        save_csv(
+            counts_df,
+            f'{column_name.lower().replace(" ", "_")}_counts.csv',
+            f"Counts and percentages of {column_name}",
+            index=True,
+        )
+        return counts_df["Count"], counts_df["Percentage"]
+    except Exception as e:
+        print(f"Error during DuckDB counts of {column_name}: {e}")
+        return None, None
+
+
+def analyse_join_counts(db_path):
+    """
+    DuckDB version of data_analysis.analyse_join_counts.
+    :param db_path: The path to the SQLite database file.
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
+    """
+    try:
+        con = get_connection(db_path)
+        join_results = con.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM case_db.cases c JOIN case_db.phone p
+                    ON c."SESSION ID" IS NOT DISTINCT FROM p."SESSION ID")
+                    AS phone_to_case_join_count,
+                (SELECT COUNT(*) FROM case_db.cases c
+                    JOIN case_db.email_web_whatsapp_community o
+                    ON c."Id" IS NOT DISTINCT FROM o."Work Item Id")
+                    AS omni_to_case_join_count,
+                (SELECT COUNT(*) FROM case_db.cases c JOIN case_db.whatsapp w
+                    ON c."Id" IS NOT DISTINCT FROM w."Case Id")
+                    AS whatsapp_to_case_join_count,
+                (SELECT COUNT(*) FROM case_db.cases c WHERE
+                    CAST(EXISTS (SELECT 1 FROM case_db.phone p
+                        WHERE p."SESSION ID" IS NOT DISTINCT FROM c."SESSION ID") AS INT)
+                    + CAST(EXISTS (SELECT 1 FROM case_db.email_web_whatsapp_community o
+                        WHERE o."Work Item Id" IS NOT DISTINCT FROM c."Id") AS INT)
+                    + CAST(EXISTS (SELECT 1 FROM case_db.whatsapp w
+                        WHERE w."Case Id" IS NOT DISTINCT FROM c."Id") AS INT) > 1)
+                    AS multiple_joins_count,
+                (SELECT COUNT(*) FROM case_db.cases c JOIN (
+                    SELECT "SESSION ID" FROM case_db.phone WHERE "SESSION ID" IS NOT NULL
+                    GROUP BY 1 HAVING COUNT(*) > 1) p ON c."SESSION ID" = p."SESSION ID")
+                    AS multiple_phone_entries_count,
+                (SELECT COUNT(*) FROM case_db.cases c JOIN (
+                    SELECT "Work Item Id" FROM case_db.email_web_whatsapp_community
+                    WHERE "Work Item Id" IS NOT NULL
+                    GROUP BY 1 HAVING COUNT(*) > 1) o ON c."Id" = o."Work Item Id")
+                    AS multiple_omni_entries_count,
+                (SELECT COUNT(*) FROM case_db.cases c JOIN (
+                    SELECT "Case Id" FROM case_db.whatsapp WHERE "Case Id" IS NOT NULL
+                    GROUP BY 1 HAVING COUNT(*) > 1) w ON c."Id" = w."Case Id")
+                    AS multiple_whatsapp_entries_count
+            """).df()
+        join_results_df = join_results.T.reset_index()
+        join_results_df.columns = ["Metric", "Count"]
+        for metric, count in join_results_df.itertuples(index=False):
+            print(f"{metric}: {count}")
+        save_csv(join_results_df, "join_analysis_results.csv", "Join analysis results")
+        return {"join_analysis_results": join_results_df}
+    except Exception as e:
+        print(f"Error during DuckDB join analysis: {e}")
+
+
+def analyse_avg_handle_time(db_path):
+    """
+    DuckDB version of data_analysis.analyse_avg_handle_time.
+    :param db_path: The path to the SQLite database file.
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
+    """
+    try:
+        con = get_connection(db_path)
+        results = {}
+        for group_column in ["Origin", "Status"]:
+            results[group_column] = con.execute(f"""
+                SELECT c."{group_column}",
+                    AVG(COALESCE(o."Handle Time", 0)) AS "Handle Time Seconds",
+                    'Omni' AS "Source"
+                {OMNI_JOIN}
+                WHERE c."{group_column}" IS NOT NULL
+                GROUP BY 1
+                UNION ALL
+                SELECT c."{group_column}",
+                    AVG(to_seconds(p."HANDLE TIME")) AS "Handle Time Seconds",
+                    'Phone' AS "Source"
+                {PHONE_JOIN}
+                WHERE c."{group_column}" IS NOT NULL
+                GROUP BY 1
+                ORDER BY "Handle Time Seconds" DESC
+                """).df()
+        save_csv(
+            results["Origin"],
+            "avg_handle_time_per_origin.csv",
+            "Average handle time per origin (sorted)",
+        )
+        save_csv(
+            results["Status"],
+            "avg_handle_time_per_status.csv",
+            "Average handle time per status (sorted)",
+        )
+
+        output = {
+            "avg_handle_time_per_origin": results["Origin"],
+            "avg_handle_time_per_status": results["Status"],
+        }
+        for group_column in ["Origin", "Status"]:
+            output_name = group_column.lower()
+            percentiles_df, histogram_df = save_handle_time_distribution(
+                _handle_time_sketches(
+                    con, [group_column], omni_seconds='o."Handle Time"'
+                ),
+                [group_column],
+                output_name,
+            )
+            output[f"handle_time_percentiles_per_{output_name}"] = percentiles_df
+            output[f"handle_time_histogram_per_{output_name}"] = histogram_df
+        return output
+    except Exception as e:
+        print(f"Error during DuckDB average handle time analysis: {e}")
+
+
+def analyse_avg_phone_entries(db_path):
+    """
+    DuckDB version of data_analysis.analyse_avg_phone_entries.
+    :param db_path: The path to the SQLite database file.
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
+    """
+    try:
+        con = get_connection(db_path)
+        averages = con.execute(f"""
+            WITH entries AS (
+                SELECT c."Id", COUNT(p."SESSION ID") AS entry_count
+                {PHONE_JOIN}
+                WHERE c."Id" IS NOT NULL
+                GROUP BY 1
+            )
+            SELECT
+                COALESCE(AVG(entry_count), 0) AS avg_phone_entries_per_case,
+                COALESCE(AVG(entry_count) FILTER (WHERE entry_count > 1), 0)
+                    AS avg_phone_entries_gt_one_call
+            FROM entries
+            """).df()
+        results_df = averages.T.reset_index()
+        results_df.columns = ["Metric", "Average"]
+        for metric, average in results_df.itertuples(index=False):
+            print(f"{metric}: {average:.2f}")
+        save_csv(
+            results_df,
+            "avg_phone_entries_analysis.csv",
+            "Average phone entries analysis",
+        )
+        return {"avg_phone_entries_analysis": results_df}
+    except Exception as e:
+        print(f"Error during DuckDB average phone entries analysis: {e}")
+
+
+def _handle_time_sketches(
+    con, group_columns, omni_seconds='recorded_seconds(o."Handle Time")'
+):
+    """
+    Builds the handle time sketches per group for omni and phone. The sketch bucket key
+    and histogram bin are computed in SQL and grouped by DuckDB, so only one row per
+    group, bucket and bin reaches Python instead of every joined row.
+    :param con: DuckDB connection from get_connection()
+    :param group_columns: list of cases columns to group by
+    :param omni_seconds: SQL expression of the omni handle time in seconds, NULL when missing
+    :return: dict of source -> dict of group key -> QuantileSketch
+    """
+    template = QuantileSketch()
+    select_columns = ", ".join(f'c."{column}"' for column in group_columns)
+    not_null = " AND ".join(f'c."{column}" IS NOT NULL' for column in group_columns)
+    # Same bucket key and histogram index as QuantileSketch.add
+    histogram_index = " + ".join(
+        f"CAST(s >= {edge} AS INTEGER)" for edge in template.histogram_edges
+    )
+    sources = {
+        "Omni": (omni_seconds, OMNI_JOIN),
+        "Phone": ('recorded_seconds(p."HANDLE TIME")', PHONE_JOIN),
+    }
+    sketches_by_source = {}
+    for source, (seconds, join) in sources.items():
+        rows = con.execute(f"""
+            WITH handle_times AS (
+                SELECT {select_columns}, {seconds} AS s
+                {join}
+                WHERE {not_null}
+            )
+            SELECT * EXCLUDE (s),
+                CASE WHEN s = 0 THEN NULL
+                    ELSE CAST(CEIL(LN(s) / {template.log_gamma!r}) AS BIGINT)
+                END AS bucket_key,
+                {histogram_index} AS histogram_index,
+                COUNT(*), SUM(s), MIN(s), MAX(s)
+            FROM handle_times
+            -- Missing (NULL) and negative handle times are skipped like QuantileSketch.add
+            WHERE s >= 0
+            GROUP BY ALL
+            """).fetchall()
+        sketches = {}
+        for row in rows:
+            key = tuple(row[: len(group_columns)])
+            sketch = sketches.setdefault(key, QuantileSketch())
+            sketch.add_counts(*row[len(group_columns) :])
+        sketches_by_source[source] = sketches
+    return sketches_by_source
+
+
+def _handle_time_by_groups(con, group_columns):
+    """
+    Average handle time per group for omni and phone.
+    :param con: DuckDB connection from get_connection()
+    :param group_columns: list of cases columns to group by
+    :return: averages data frame
+    """
+    select_columns = ", ".join(f'c."{column}"' for column in group_columns)
+    not_null = " AND ".join(f'c."{column}" IS NOT NULL' for column in group_columns)
+    group_by = ", ".join(str(i + 1) for i in range(len(group_columns)))
+    return con.execute(f"""
+        SELECT {select_columns},
+            AVG(to_seconds(o."Handle Time")) AS "Handle Time Seconds", 'Omni' AS "Source"
+        {OMNI_JOIN}
+        WHERE {not_null}
+        GROUP BY {group_by}
+        UNION ALL
+        SELECT {select_columns},
+            AVG(to_seconds(p."HANDLE TIME")) AS "Handle Time Seconds", 'Phone' AS "Source"
+        {PHONE_JOIN}
+        WHERE {not_null}
+        GROUP BY {group_by}
+        ORDER BY "Handle Time Seconds" DESC
+        """).df()
+
+
+def analyse_avg_handle_time_by_issue_type(db_path):
+    """
+    DuckDB version of data_analysis.analyse_avg_handle_time_by_issue_type.
+    :param db_path: The path to the SQLite database file.
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
+    """
+    try:
+        con = get_connection(db_path)
+        averages_df = _handle_time_by_groups(con, ["Issue type"])
+        save_csv(
+            averages_df,
+            "avg_handle_time_per_issue_type.csv",
+            "Average handle time per issue type (sorted)",
+        )
+        percentiles_df, histogram_df = save_handle_time_distribution(
+            _handle_time_sketches(con, ["Issue type"]), ["Issue type"], "issue_type"
+        )
+        return {
+            "avg_handle_time_per_issue_type": averages_df,
+            "handle_time_percentiles_per_issue_type": percentiles_df,
+            "handle_time_histogram_per_issue_type": histogram_df,
+        }
+    except Exception as e:
+        print(f"Error during DuckDB average handle time per issue type analysis: {e}")
+
+
+def analyse_handle_time_issue_origin_counts(db_path):
+    """
+    DuckDB version of data_analysis.analyse_handle_time_issue_origin_counts.
+    :param db_path: The path to the SQLite database file.
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
+    """
+    try:
+        con = get_connection(db_path)
+        averages_df = _handle_time_by_groups(con, ["Issue type", "Origin"])
+        merged_df = con.execute("""
+            SELECT a.*, n."Count"
+            FROM averages_df a
+            LEFT JOIN (
+                SELECT "Issue type", "Origin", COUNT(*) AS "Count"
+                FROM case_db.cases
+                WHERE "Issue type" IS NOT NULL AND "Origin" IS NOT NULL
+                GROUP BY 1, 2
+            ) n USING ("Issue type", "Origin")
+            ORDER BY "Handle Time Seconds" DESC
+            """).df()
+        save_csv(
+            merged_df,
+            "avg_handle_time_issue_origin_counts.csv",
+            "Average handle time, counts per issue type and origin",
+        )
+        percentiles_df, histogram_df = save_handle_time_distribution(
+            _handle_time_sketches(con, ["Issue type", "Origin"]),
+            ["Issue type", "Origin"],
+            "issue_type_origin",
+        )
+        return {
+            "avg_handle_time_issue_origin_counts": merged_df,
+            "handle_time_percentiles_per_issue_type_origin": percentiles_df,
+            "handle_time_histogram_per_issue_type_origin": histogram_df,
+        }
+    except Exception as e:
+        print(
+            f"Error during DuckDB handle time per issue type and origin analysis: {e}"
+        )
+
+
+def analyse_whatsapp_success_rate(db_path):
+    """
+    DuckDB version of data_analysis.analyse_whatsapp_success_rate.
+    :param db_path: The path to the SQLite database file.
+    :return: dict of output name -> result data frame (as saved to CSV), or None on error
+    """
+    try:
+        con = get_connection(db_path)
+        success_rate_df = con.execute("""
+            SELECT
+                CASE "Agent Type" WHEN 'Bot' THEN 'Bot' ELSE 'Human' END AS "Agent Type",
+                COUNT(*) AS "Total Interactions",
+                COUNT(*) FILTER (WHERE "Agent Message Count" > 0)
+                    AS "Successful Interactions (Message Count > 0)"
+            FROM case_db.whatsapp
+            WHERE "Agent Type" IN ('Bot', 'Agent')
+            GROUP BY 1
+            """).df()
+        success_rate_df = (
+            success_rate_df.set_index("Agent Type")
+            .reindex(["Bot", "Human"], fill_value=0)
+            .reset_index()
+        )
+        total = success_rate_df["Total Interactions"]
+        success_rate_df["Success Rate (%)"] = (
+            success_rate_df["Successful Interactions (Message Count > 0)"] / total * 100
+        ).where(total > 0, 0)
+        save_csv(
+            success_rate_df,
+            "whatsapp_success_rate.csv",
+            "WhatsApp bot vs. human success rate analysis (based on message count > 0)",
+        )
+        return {"whatsapp_success_rate": success_rate_df}
+    except Exception as e:
+        print(f"Error during DuckDB WhatsApp success rate analysis: {e}")
@@ -0,0 +1,252 @@
+import re
+import time
+
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import linear_kernel
+except ImportError:  # scikit-learn is optional, keyword rules still work without it
+    TfidfVectorizer = None
+
+# Help section titles in prompt_instructions.txt, used to match answers to intents
+INTENT_TITLES = {
+    "profile_text": "How do I update my profile description?",
+    "vetting": "I have just joined Checkatrade and need support completing Vetting",
+    "getting_leads": "I've just joined Checkatrade, how do I start getting leads?",
+    "invoice": "Understanding my invoice",
+}
+
+# Question shaped phrases, matched on word boundaries against the lower cased user
+# query. A phrase of exactly one intent asks the documented question, so it is answered
+# without the LLM. Phrases that only name the topic (e.g. 'direct debit') belong in
+# INTENT_TERMS, as queries about a problem with it need the LLM or an agent.
+INTENT_PHRASES = {
+    "profile_text": [
+        "how do i update my profile",
+        "how do i change my profile",
+        "how do i edit my profile",
+        "how can i update my profile",
+        "how can i change my profile",
+        "change the text on my profile",
+        "edit my company description",
+    ],
+    "vetting": [
+        "need help with vetting",
+        "support completing vetting",
+        "upload my outstanding documents",
+        "where do i upload my documents",
+        "verify my id",
+        "complete my id verification",
+    ],
+    "getting_leads": [
+        "how do i get more leads",
+        "how can i get more leads",
+        "how do i start getting leads",
+        "not getting enough leads",
+        "not getting enough enquiries",
+        "how do i get more enquiries",
+        "how do i add my accreditation",
+        "send my public liability insurance",
+        "provide my public liability insurance",
+    ],
+    "invoice": [
+        "understand my invoice",
+        "explain my invoice",
+        "when will the direct debit be taken",
+        "when is the direct debit taken",
+        "when will my payment be taken",
+        "can i pay by bacs",
+        "why is there vat on my",
+    ],
+}
+
+# Topic terms only narrow down the TF-IDF match, they never answer on their own
+INTENT_TERMS = {
+    "profile_text": ["description", "profile", "profile text"],
+    "vetting": [
+        "vetting",
+        "vetted",
+        "documents",
+        "joined",
+        "id verification",
+        "mitek",
+        "applicant area",
+    ],
+    "getting_leads": [
+        "leads",
+        "enquiries",
+        "accreditation",
+        "accreditations",
+        "certificate",
+        "insurance",
+    ],
+    "invoice": ["invoice", "vat", "billed", "bacs", "payment", "direct debit"],
+}
+
+# Queries mentioning these always go to the LLM (and on to an agent if needed), even
+# when they also mention a documented topic: complaints and account problems or changes
+ESCALATION_TERMS = [
+    "cancel",
+    "refund",
+    "complaint",
+    "complain",
+    "claim",
+    "dispute",
+    "fraud",
+    "fake",
+    "stop",
+    "failed",
+    "rejected",
+    "appeal",
+    "removed",
+    "renew",
+    "permission",
+]
+
+
+def _word_pattern(words):
+    return re.compile(r"\b(" + "|".join(re.escape(word) for word in words) + r")\b")
+
+
+def parse_help_sections(instructions):
+    """
+    Splits the 'Help Documentation' block of the prompt instructions into sections.
+    Each section starts with a line beginning with '-' (the help article title).
+    :param instructions: contents of prompt_instructions.txt
+    :return: list of (title, answer) tuples in file order
+    """
+    if "Help Documentation:" in instructions:
+        instructions = instructions.split("Help Documentation:", 1)[1]
+    sections = []
+    for block in re.split(r"^-\s*", instructions, flags=re.MULTILINE)[1:]:
+        # The closing instruction to the bot follows the last section after a blank line
+        block = block.strip().split("\n\n", 1)[0]
+        title, _, answer = block.partition("\n")
+        sections.append((title.strip(), answer.strip()))
+    return sections
+
+
+class IntentRouter:
+    """
+    CPU-only router that answers common queries from the documented help sections
+    without an LLM call. Question shaped phrases are tried first, then (if
+    scikit-learn is installed) a TF-IDF nearest-sentence model trained on the help
+    sections. Topic terms alone never bypass the LLM, and queries that mention an
+    escalation term (cancel, refund, ...) or match neither confidently fall back to it.
+    """
+
+    def __init__(self, instructions, min_similarity=0.5, min_shared_terms=2):
+        """
+        :param instructions: contents of prompt_instructions.txt
+        :type instructions: str
+        :param min_similarity: minimum TF-IDF cosine similarity to answer without the LLM
+        :type min_similarity: float
+        :param min_shared_terms: minimum number of TF-IDF terms (words or word pairs) the
+            query must share with the matched help sentence, not counting terms made up
+            only of topic term words (sharing just 'direct debit' says nothing about
+            what is asked)
+        :type min_shared_terms: int
+        """
+        sections = dict(parse_help_sections(instructions))
+        titles = {title.lower(): title for title in sections}
+        missing = [
+            title for title in INTENT_TITLES.values() if title.lower() not in titles
+        ]
+        if missing:
+            raise ValueError(f"Help sections not found in the instructions: {missing}")
+        # Matched by title, so reordering the help sections cannot swap the answers
+        self.answers = {
+            intent: sections[titles[title.lower()]]
+            for intent, title in INTENT_TITLES.items()
+        }
+        self.min_similarity = min_similarity
+        self.min_shared_terms = min_shared_terms
+        self.phrase_patterns = {
+            intent: _word_pattern(phrases) for intent, phrases in INTENT_PHRASES.items()
+        }
+        self.term_patterns = {
+            intent: _word_pattern(terms) for intent, terms in INTENT_TERMS.items()
+        }
+        self.escalation_pattern = _word_pattern(ESCALATION_TERMS)
+
+        self.vectorizer = None
+        if TfidfVectorizer is not None:
+            documents = []
+            self.document_intents = []
+            for intent, title in INTENT_TITLES.items():
+                answer = self.answers[intent]
+                for text in [title, *answer.splitlines(), *INTENT_PHRASES[intent]]:
+                    documents.append(text)
+                    self.document_intents.append(intent)
+            self.vectorizer = TfidfVectorizer(
+                stop_words="english", ngram_range=(1, 2), sublinear_tf=True
+            )
+            self.document_vectors = self.vectorizer.fit_transform(documents)
+            topic_words = {
+                word
+                for terms in INTENT_TERMS.values()
+                for term in terms
+                for word in term.split()
+            }
+            self.topic_term_indices = {
+                index
+                for term, index in self.vectorizer.vocabulary_.items()
+                if set(term.split()) <= topic_words
+            }
+
+    def classify(self, user_query):
+        """
+        Classifies a user query.
+        :param user_query: text typed by the user
+        :return: (intent, method) where method is 'keyword', 'tfidf' or 'llm' (intent None)
+        """
+        query = user_query.lower()
+        if self.escalation_pattern.search(query):
+            return None, "llm"
+
+        phrase_matches = {
+            intent
+            for intent, pattern in self.phrase_patterns.items()
+            if pattern.search(query)
+        }
+        if len(phrase_matches) == 1:
+            return phrase_matches.pop(), "keyword"
+
+        if self.vectorizer is not None:
+            query_vector = self.vectorizer.transform([query])
+            similarities = linear_kernel(query_vector, self.document_vectors)[0]
+            best = similarities.argmax()
+            intent = self.document_intents[best]
+            # Sharing only the topic (e.g. 'direct debit') or a single word is not
+            # enough evidence that the query asks the documented question
+            shared_terms = (
+                set(query_vector.indices) & set(self.document_vectors[best].indices)
+            ) - self.topic_term_indices
+            # Keyword matches (ambiguous phrases or topic terms) restrict the answer
+            # to one of the matched intents
+            matches = phrase_matches or {
+                term_intent
+                for term_intent, pattern in self.term_patterns.items()
+                if pattern.search(query)
+            }
+            if (
+                similarities[best] >= self.min_similarity
+                and len(shared_terms) >= self.min_shared_terms
+                and (not matches or intent in matches)
+            ):
+                return intent, "tfidf"
+        return None, "llm"
+
+    def route(self, user_query):
+        """
+        Routes a user query and times the decision.
+        :param user_query: text typed by the user
+        :return: dict with 'intent', 'method', 'answer' (None if the LLM is needed) and 'latency_ms'
+        """
+        start = time.perf_counter()
+        intent, method = self.classify(user_query)
+        return {
+            "intent": intent,
+            "method": method,
+            "answer": self.answers.get(intent),
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        }
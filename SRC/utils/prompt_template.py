@@ -0,0 +1,48 @@
+def estimate_tokens(text):
+    """
+    Rough local token count (about 4 characters per token for English text).
+    :param text: text to count
+    :return: estimated number of tokens
+    """
+    return max(1, (len(text) + 3) // 4)
+
+
+class PromptTemplate:
+    """
+    Bot prompt split into a fixed prefix (the help documentation instructions) and a
+    per-query suffix. The prefix is built and tokenised once when the template is
+    loaded and is byte-identical on every request, which is what lets the provider
+    cache it. Only the short suffix is counted per request.
+    """
+
+    SUFFIX_TEMPLATE = "User Query: {user_query}\n\nResponse:"
+
+    def __init__(self, instructions, max_prompt_tokens=8000, token_counter=None):
+        """
+        :param instructions: instruction block, e.g. the contents of prompt_instructions.txt
+        :type instructions: str
+        :param max_prompt_tokens: token budget for the full prompt of a single request
+        :type max_prompt_tokens: int
+        :param token_counter: function returning the token count of a text, used once for the
+            prefix, defaults to estimate_tokens. Suffixes are always estimated locally.
+        :type token_counter: callable or None
+        """
+        self.prefix = f"{instructions}\n\n"
+        self.max_prompt_tokens = max_prompt_tokens
+        self.prefix_tokens = (token_counter or estimate_tokens)(self.prefix)
+
+    def render(self, user_query):
+        """
+        Builds the full prompt for a user query, enforcing the token budget.
+        :param user_query: text typed by the user
+        :return: (prompt, estimated prompt tokens), or (None, estimated prompt tokens) if over budget
+        """
+        suffix = self.SUFFIX_TEMPLATE.format(user_query=user_query)
+        prompt_tokens = self.prefix_tokens + estimate_tokens(suffix)
+        if prompt_tokens > self.max_prompt_tokens:
+            print(
+                f"Error: Prompt of ~{prompt_tokens} tokens exceeds the budget of "
+                f"{self.max_prompt_tokens} tokens."
+            )
+            return None, prompt_tokens
+        return self.prefix + suffix, prompt_tokens
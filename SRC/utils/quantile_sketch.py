@@ -0,0 +1,167 @@
+import math
+
+# Histogram bucket edges in seconds (1 min, 5 min, 10 min, 30 min, 1 h, 2 h, 4 h)
+DEFAULT_HISTOGRAM_EDGES = [60, 300, 600, 1800, 3600, 7200, 14400]
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch for non-negative values (DDSketch style).
+
+    Values are counted in logarithmically sized buckets, so any quantile is returned
+    within a relative error of ``relative_accuracy`` while memory only grows with the
+    log of the value range, not with the number of values. Two sketches built with the
+    same settings can be merged, so groups can be sketched in chunks or in parallel
+    and combined afterwards. Exact counts for fixed histogram edges are kept alongside.
+    """
+
+    def __init__(self, relative_accuracy=0.01, histogram_edges=None):
+        """
+        :param relative_accuracy: maximum relative error of returned quantiles, defaults to 1%.
+        :type relative_accuracy: float
+        :param histogram_edges: ascending upper bucket edges in seconds, defaults to DEFAULT_HISTOGRAM_EDGES.
+        :type histogram_edges: list or None
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.histogram_edges = list(
+            histogram_edges if histogram_edges is not None else DEFAULT_HISTOGRAM_EDGES
+        )
+        self.histogram_counts = [0] * (len(self.histogram_edges) + 1)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """
+        Adds a single value to the sketch. None/NaN and negative values are ignored.
+        :param value: handle time in seconds
+        """
+        if value is None:
+            return
+        value = float(value)
+        if math.isnan(value) or value < 0:
+            return
+
+        if value == 0:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+
+        self.histogram_counts[self._histogram_index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def add_counts(
+        self, bucket_key, histogram_index, count, total, min_value, max_value
+    ):
+        """
+        Adds values that were already aggregated elsewhere (e.g. by a SQL GROUP BY on
+        bucket key and histogram index) without visiting them one by one.
+        :param bucket_key: ceil(ln(value) / log_gamma) of the values, or None for zeros
+        :param histogram_index: index of the histogram bin of the values
+        :param count: number of values
+        :param total: sum of the values
+        :param min_value: smallest value
+        :param max_value: largest value
+        """
+        if bucket_key is None:
+            self.zero_count += count
+        else:
+            self.buckets[bucket_key] = self.buckets.get(bucket_key, 0) + count
+        self.histogram_counts[histogram_index] += count
+        self.count += count
+        self.total += total
+        self.min = min_value if self.min is None else min(self.min, min_value)
+        self.max = max_value if self.max is None else max(self.max, max_value)
+
+    def update(self, values):
+        """
+        Adds every value of an iterable (e.g. a pandas Series) to the sketch.
+        :param values: iterable of handle times in seconds
+        :return: the sketch itself, so calls can be chained
+        """
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one in place.
+        :param other: sketch built with the same relative accuracy and histogram edges
+        :return: the sketch itself
+        """
+        if (
+            other.relative_accuracy != self.relative_accuracy
+            or other.histogram_edges != self.histogram_edges
+        ):
+            raise ValueError("Cannot merge sketches with different settings.")
+
+        for key, bucket_count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + bucket_count
+        self.histogram_counts = [
+            a + b for a, b in zip(self.histogram_counts, other.histogram_counts)
+        ]
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """
+        Returns the approximate value at quantile q.
+        :param q: quantile between 0 and 1
+        :return: approximate value, or None if the sketch is empty
+        """
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile must be between 0 and 1, got {q}")
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Bucket midpoint keeps the relative error within relative_accuracy
+                value = 2 * self.gamma**key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def mean(self):
+        """
+        :return: exact mean of the added values, or None if the sketch is empty
+        """
+        return self.total / self.count if self.count else None
+
+    def histogram(self):
+        """
+        Returns the exact histogram counts as (label, count) pairs, e.g. ("60-300", 12).
+        :return: list of tuples
+        """
+        labels = []
+        lower = 0
+        for edge in self.histogram_edges:
+            labels.append(f"{lower}-{edge}")
+            lower = edge
+        labels.append(f"{lower}+")
+        return list(zip(labels, self.histogram_counts))
+
+    def _histogram_index(self, value):
+        for index, edge in enumerate(self.histogram_edges):
+            if value < edge:
+                return index
+        return len(self.histogram_edges)